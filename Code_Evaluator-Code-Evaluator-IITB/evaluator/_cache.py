@@ -0,0 +1,77 @@
+"""Content-addressed JSON disk cache (evaluation results, lint results)."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from evaluator.schema import EvaluationResult
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(
+    os.environ.get("CODE_EVAL_CACHE_DIR")
+    or Path.home() / ".cache" / "code_eval"
+)
+
+
+def cache_key(*parts: str) -> str:
+    """Hash the given strings into a cache key."""
+    h = hashlib.blake2b(digest_size=32)
+    for part in parts:
+        data = part.encode()
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") differ
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def load(namespace: str, key: str) -> dict | list | None:
+    """Return the JSON value stored under namespace/key, or None."""
+    path = CACHE_DIR / namespace / f"{key}.json"
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable cache entry {path}: {e}")
+        return None
+
+
+def store(namespace: str, key: str, value: dict | list) -> None:
+    """Store a JSON value under namespace/key, replacing it atomically."""
+    directory = CACHE_DIR / namespace
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, directory / f"{key}.json")
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        logger.warning(f"Could not write cache entry {namespace}/{key}: {e}")
+
+
+def get(key: str) -> EvaluationResult | None:
+    """Return the cached evaluation result for key, if any."""
+    data = load("results", key)
+    if data is None:
+        return None
+    try:
+        return EvaluationResult.from_dict(data)
+    except (KeyError, TypeError) as e:
+        logger.warning(f"Ignoring stale cache entry results/{key}: {e}")
+        return None
+
+
+def put(key: str, result: EvaluationResult) -> None:
+    """Cache an evaluation result under key."""
+    store("results", key, result.to_dict())
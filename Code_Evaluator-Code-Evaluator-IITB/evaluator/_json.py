@@ -0,0 +1,29 @@
+"""JSON encoding and decoding, through orjson when it is installed."""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup (see README)
+    orjson = None
+
+# Raised by loads on malformed input; orjson's error is a subclass of it
+JSONDecodeError = json.JSONDecodeError
+
+loads = json.loads if orjson is None else orjson.loads
+
+
+def dumps(value: Any, indent: int | None = None) -> str:
+    """
+    Serialize value to a JSON string.
+
+    orjson handles compact output and indent=2, the only indentation it
+    supports; any other indent goes through the standard library.
+    """
+    if orjson is not None and indent in (None, 2):
+        option = orjson.OPT_INDENT_2 if indent == 2 else 0
+        return orjson.dumps(value, option=option).decode()
+    return json.dumps(value, indent=indent)
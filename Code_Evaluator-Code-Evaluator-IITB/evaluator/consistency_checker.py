@@ -91,7 +91,7 @@ def audit_hallucinations(
         )
 
     # 3. Check style claims vs static analysis
-    warning_count = len([w for w in artifact.static_warnings if w.rule != "TOOL_ERROR"])
+    warning_count = sum(1 for w in artifact.static_warnings if w.rule != "TOOL_ERROR")
     if judgment.scores.style > 8.0 and warning_count > 5:
         flags.append(
             f"HALLUCINATION: LLM claims good style ({judgment.scores.style}) "
@@ -131,6 +131,9 @@ def audit_hallucinations(
     return flags
 
 
+GRADER_DIMENSIONS = ("correctness", "edge_cases", "complexity", "style", "clarity", "overall")
+
+
 def compute_grader_accuracy(
     predicted_scores: list[dict],
     gold_scores: list[dict],
@@ -140,18 +143,36 @@ def compute_grader_accuracy(
 
     Returns MAE, exact match %, and correlation per dimension.
     """
-    dimensions = ["correctness", "edge_cases", "complexity", "style", "clarity", "overall"]
+    pred_columns = {}
+    gold_columns = {}
 
-    metrics = {}
+    for dim in GRADER_DIMENSIONS:
+        pairs = [
+            (float(pred[dim]), float(gold[dim]))
+            for pred, gold in zip(predicted_scores, gold_scores)
+            if dim in pred and dim in gold
+        ]
+        pred_columns[dim] = [p for p, _ in pairs]
+        gold_columns[dim] = [g for _, g in pairs]
 
-    for dim in dimensions:
-        pred_vals = []
-        gold_vals = []
+    return compute_grader_accuracy_columns(pred_columns, gold_columns)
+
+
+def compute_grader_accuracy_columns(
+    pred_columns: dict[str, list[float]],
+    gold_columns: dict[str, list[float]],
+) -> dict:
+    """
+    Grader accuracy metrics from column-wise scores.
+
+    Each mapping holds one list of scores per dimension, aligned by index.
+    Dimensions with no scores are skipped.
+    """
+    metrics = {}
 
-        for pred, gold in zip(predicted_scores, gold_scores):
-            if dim in pred and dim in gold:
-                pred_vals.append(float(pred[dim]))
-                gold_vals.append(float(gold[dim]))
+    for dim in GRADER_DIMENSIONS:
+        pred_vals = pred_columns.get(dim, [])
+        gold_vals = gold_columns.get(dim, [])
 
         if not pred_vals:
             continue
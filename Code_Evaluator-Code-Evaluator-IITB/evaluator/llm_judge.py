@@ -18,11 +18,14 @@ import json
 import logging
 import os
 import re
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
 
 import requests as http_requests
 from huggingface_hub import InferenceClient
 
+from evaluator import _json
 from evaluator.schema import (
     ExecutionArtifact,
     LLMJudgment,
@@ -38,6 +41,10 @@ FALLBACK_MODELS = [
     "bigcode/starcoder2-15b",
 ]
 
+# Seconds to wait on the primary model before also dialing the first
+# fallback model (hedged request). Fan-out is capped at two models.
+HEDGE_DELAY_SECONDS = 10.0
+
 # Capability cache: avoids repeated metadata queries for the same model
 _capability_cache: dict[str, set[str]] = {}
 
@@ -64,9 +71,7 @@ CRITICAL RULES:
 You MUST respond ONLY with valid JSON matching the requested schema. \
 No markdown fences, no explanation outside the JSON object."""
 
-USER_PROMPT_TEMPLATE = """\
-Evaluate the following code submission based on the evidence below.
-
+EVIDENCE_TEMPLATE = """\
 ## Problem Statement
 {problem_statement}
 
@@ -104,13 +109,15 @@ Evaluate the following code submission based on the evidence below.
 - Complexity: {det_complexity}/10
 - Style: {det_style}/10
 - Clarity: {det_clarity}/10
+"""
 
-## Task
+_TASK_INSTRUCTIONS = """\
 Provide scores on a 0-10 scale for each rubric dimension. Ground your scores \
 in the evidence above. Adjustments from deterministic scores should be within \
 +/- 2 points and must be justified.
+"""
 
-Respond with valid JSON in this exact format:
+_JUDGMENT_SCHEMA = """\
 {{
     "scores": {{
         "correctness": <float 0-10>,
@@ -126,6 +133,35 @@ Respond with valid JSON in this exact format:
     "uncertainty_flags": ["<flag1 if any>"]
 }}"""
 
+USER_PROMPT_TEMPLATE = (
+    "Evaluate the following code submission based on the evidence below.\n\n"
+    + EVIDENCE_TEMPLATE
+    + "\n## Task\n"
+    + _TASK_INSTRUCTIONS
+    + "\nRespond with valid JSON in this exact format:\n"
+    + _JUDGMENT_SCHEMA
+)
+
+# Packed variant: several submissions share one call, so the system prompt
+# and per-request overhead are paid once. Evidence blocks are numbered and
+# the model returns one judgment per submission, in order.
+PACKED_PROMPT_HEADER = """\
+Evaluate each of the following {count} code submissions independently. \
+Judge every submission ONLY on the evidence given in its own section.
+
+"""
+
+PACKED_TASK_TEMPLATE = (
+    "## Task\n"
+    "For EACH submission above:\n"
+    + _TASK_INSTRUCTIONS
+    + "\nRespond with valid JSON of the form "
+    '{{"judgments": [<judgment 1>, ..., <judgment {count}>]}}, '
+    "with exactly {count} judgments in submission order, where each "
+    "judgment has this exact format:\n"
+    + _JUDGMENT_SCHEMA
+)
+
 
 # ---------------------------------------------------------------------------
 # API Token
@@ -290,30 +326,163 @@ def _invoke_model(
         raise
 
 
+def _invoke_and_parse(
+    system_prompt: str,
+    user_prompt: str,
+    model: str,
+    api_token: str,
+) -> tuple[dict | None, str]:
+    """Invoke a model and parse its response. Returns (parsed, raw_text)."""
+    response_text = _invoke_model(system_prompt, user_prompt, model, api_token)
+    return _parse_llm_response(response_text), response_text
+
+
+def _start_call(fn, *args) -> Future:
+    """
+    Run fn(*args) on a daemon thread and return a Future for its result.
+
+    Executor threads are joined at interpreter exit even after
+    shutdown(wait=False), so a request abandoned by _invoke_hedged would
+    hold up exit until the client timeout; a daemon thread does not.
+    """
+    future: Future = Future()
+
+    def run() -> None:
+        future.set_running_or_notify_cancel()
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    threading.Thread(target=run, name="llm-hedge", daemon=True).start()
+    return future
+
+
+def _invoke_hedged(
+    system_prompt: str,
+    user_prompt: str,
+    model: str,
+    hedge_model: str | None,
+    api_token: str,
+    tried: set[str],
+    hedge_delay: float = HEDGE_DELAY_SECONDS,
+) -> tuple[dict | None, str, str]:
+    """
+    Invoke the primary model, hedging with a second model if it is slow.
+
+    If the primary has not answered within hedge_delay seconds, the hedge
+    model is started in parallel. The first response that parses wins and
+    the other request is abandoned. Every model started is added to tried,
+    also when this raises, so callers do not call it again as a fallback.
+    Returns (parsed, raw_text, model_used). Raises the primary's exception
+    if no model produced a response.
+    """
+    tried.add(model)
+    primary = _start_call(
+        _invoke_and_parse, system_prompt, user_prompt, model, api_token
+    )
+    done, _ = wait([primary], timeout=hedge_delay)
+    if done or not hedge_model:
+        parsed, response_text = primary.result()
+        return parsed, response_text, model
+
+    logger.info(
+        f"{model} slower than {hedge_delay}s, hedging with {hedge_model}"
+    )
+    tried.add(hedge_model)
+    futures = {
+        primary: model,
+        _start_call(
+            _invoke_and_parse,
+            system_prompt, user_prompt, hedge_model, api_token,
+        ): hedge_model,
+    }
+    pending = set(futures)
+    fallback: tuple[dict | None, str, str] | None = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            if fut.exception() is not None:
+                logger.warning(
+                    f"Hedged call to {futures[fut]} failed: {fut.exception()}"
+                )
+                continue
+            parsed, response_text = fut.result()
+            if parsed is not None:
+                return parsed, response_text, futures[fut]
+            fallback = fallback or (None, response_text, futures[fut])
+
+    if fallback is not None:
+        return fallback
+    return primary.result() + (model,)
+
+
 # ---------------------------------------------------------------------------
 # Response Parsing
 # ---------------------------------------------------------------------------
 
-def _parse_llm_response(response_text: str) -> dict | None:
-    """Extract and parse JSON from LLM response."""
-    if not response_text:
-        return None
+# Rubric dimensions every judgment must score; built once at import
+_REQUIRED_SCORES = frozenset(
+    ("correctness", "edge_cases", "complexity", "style", "clarity")
+)
+
+
+def _is_valid_judgment(data: object) -> bool:
+    """Check that parsed JSON has a scores object with every dimension."""
+    if not isinstance(data, dict):
+        return False
+    scores = data.get("scores")
+    return isinstance(scores, dict) and _REQUIRED_SCORES.issubset(scores)
+
+
+def _load_json_object(response_text: str) -> object | None:
+    """
+    Parse the JSON object in an LLM response.
+
+    Well-behaved models return bare JSON (the system prompt forbids fences),
+    so that case is parsed directly; otherwise the outermost {...} span is
+    extracted with a regex.
+    """
+    stripped = response_text.strip()
+    if stripped.startswith("{"):
+        try:
+            return _json.loads(stripped)
+        except json.JSONDecodeError:
+            pass
     json_match = re.search(r"\{[\s\S]*\}", response_text)
     if json_match:
         try:
-            data = json.loads(json_match.group())
-            if "scores" in data and isinstance(data["scores"], dict):
-                required = {
-                    "correctness", "edge_cases", "complexity",
-                    "style", "clarity",
-                }
-                if required.issubset(data["scores"].keys()):
-                    return data
+            return _json.loads(json_match.group())
         except json.JSONDecodeError:
-            pass
+            return None
     return None
 
 
+def _parse_llm_response(response_text: str) -> dict | None:
+    """Extract and parse JSON from LLM response."""
+    if not response_text:
+        return None
+    data = _load_json_object(response_text)
+    return data if _is_valid_judgment(data) else None
+
+
+def _parse_packed_response(
+    response_text: str, expected: int
+) -> list[dict] | None:
+    """Parse a packed response; None unless it has `expected` valid judgments."""
+    if not response_text:
+        return None
+    data = _load_json_object(response_text)
+    judgments = data.get("judgments") if isinstance(data, dict) else None
+    if not isinstance(judgments, list) or len(judgments) != expected:
+        return None
+    if not all(_is_valid_judgment(j) for j in judgments):
+        return None
+    return judgments
+
+
 def _clamp(val: float, lo: float = 0.0, hi: float = 10.0) -> float:
     return round(max(lo, min(hi, float(val))), 2)
 
@@ -322,53 +491,127 @@ def _clamp(val: float, lo: float = 0.0, hi: float = 10.0) -> float:
 # Prompt Construction
 # ---------------------------------------------------------------------------
 
+# Failure messages longer than this are condensed before prompt injection
+_MAX_FAILURE_CHARS = 200
+_MAX_SUMMARY_CHARS = 300
+
+
+def _summarize_failure(message: str) -> str:
+    """
+    Condense a test failure message for the prompt.
+
+    Long tracebacks keep only the innermost frame, its source line and the
+    exception line; outer frames and multi-line assertion diffs are dropped,
+    since they inflate prompt tokens without adding evidence.
+    """
+    if len(message) <= _MAX_FAILURE_CHARS:
+        return message.strip()
+
+    lines = message.strip().splitlines()
+    frames = [i for i, ln in enumerate(lines) if ln.lstrip().startswith('File "')]
+    if not frames:
+        return message[:_MAX_FAILURE_CHARS]
+
+    innermost = frames[-1]
+    parts = [lines[innermost].strip()]
+    following = lines[innermost + 1:]
+    if following and following[0].startswith("    "):
+        parts.append(following[0].strip())
+    exc_line = next((ln for ln in following if ln and not ln[0].isspace()), "")
+    parts.append(exc_line)
+    return " | ".join(parts)[:_MAX_SUMMARY_CHARS]
+
+
+def _evidence_fields(
+    problem_statement: str,
+    submission_code: str,
+    reference_code: str,
+    artifact: ExecutionArtifact,
+    deterministic_scores: RubricScores,
+    sanitized_code: str | None = None,
+) -> dict:
+    """Collect the format fields shared by the single and packed prompts."""
+    if sanitized_code is None:
+        sanitized_code = strip_comments(submission_code)
+
+    tests = artifact.test_results
+    warnings = artifact.static_warnings
+
+    failed_details = "".join(
+        f"- {r.test_name}: "
+        f"{_summarize_failure(r.message) if r.message else 'No details'}\n"
+        for r in tests.results
+        if not r.passed
+    ) or "None - all tests passed."
+
+    warning_details = "".join(
+        f"- [{w.rule}] Line {w.line}: {w.message}\n" for w in warnings
+    ) or "None - no warnings."
+
+    return {
+        "problem_statement": problem_statement,
+        "sanitized_code": sanitized_code,
+        "reference_code": reference_code,
+        "total_tests": tests.total,
+        "passed_tests": tests.passed,
+        "failed_tests": tests.failed,
+        "error_tests": tests.errors,
+        "pass_rate": tests.pass_rate,
+        "execution_time": artifact.execution_time,
+        "timeout": artifact.timeout,
+        "sandbox_violation": artifact.sandbox_violation,
+        "failed_details": failed_details,
+        "total_warnings": len(warnings),
+        "warning_details": warning_details,
+        "det_correctness": deterministic_scores.correctness,
+        "det_edge_cases": deterministic_scores.edge_cases,
+        "det_complexity": deterministic_scores.complexity,
+        "det_style": deterministic_scores.style,
+        "det_clarity": deterministic_scores.clarity,
+    }
+
+
 def build_grading_prompt(
     problem_statement: str,
     submission_code: str,
     reference_code: str,
     artifact: ExecutionArtifact,
     deterministic_scores: RubricScores,
+    sanitized_code: str | None = None,
 ) -> str:
-    """Build the user-facing evidence prompt (system prompt is separate)."""
-    sanitized = strip_comments(submission_code)
-
-    failed_details = ""
-    for r in artifact.test_results.results:
-        if not r.passed:
-            msg = r.message[:200] if r.message else "No details"
-            failed_details += f"- {r.test_name}: {msg}\n"
-    if not failed_details:
-        failed_details = "None - all tests passed."
-
-    warning_details = ""
-    for w in artifact.static_warnings:
-        warning_details += f"- [{w.rule}] Line {w.line}: {w.message}\n"
-    if not warning_details:
-        warning_details = "None - no warnings."
+    """
+    Build the user-facing evidence prompt (system prompt is separate).
 
+    Pass sanitized_code when the caller already stripped the submission.
+    """
     return USER_PROMPT_TEMPLATE.format(
-        problem_statement=problem_statement,
-        sanitized_code=sanitized,
-        reference_code=reference_code,
-        total_tests=artifact.test_results.total,
-        passed_tests=artifact.test_results.passed,
-        failed_tests=artifact.test_results.failed,
-        error_tests=artifact.test_results.errors,
-        pass_rate=artifact.test_results.pass_rate,
-        execution_time=artifact.execution_time,
-        timeout=artifact.timeout,
-        sandbox_violation=artifact.sandbox_violation,
-        failed_details=failed_details,
-        total_warnings=len(artifact.static_warnings),
-        warning_details=warning_details,
-        det_correctness=deterministic_scores.correctness,
-        det_edge_cases=deterministic_scores.edge_cases,
-        det_complexity=deterministic_scores.complexity,
-        det_style=deterministic_scores.style,
-        det_clarity=deterministic_scores.clarity,
+        **_evidence_fields(
+            problem_statement,
+            submission_code,
+            reference_code,
+            artifact,
+            deterministic_scores,
+            sanitized_code,
+        )
     )
 
 
+def build_packed_prompt(items: list[dict]) -> str:
+    """
+    Build one user prompt covering several submissions.
+
+    Each item holds the keyword arguments of build_grading_prompt.
+    """
+    count = len(items)
+    sections = [PACKED_PROMPT_HEADER.format(count=count)]
+    for index, item in enumerate(items, start=1):
+        sections.append(f"# Submission {index}\n\n")
+        sections.append(EVIDENCE_TEMPLATE.format(**_evidence_fields(**item)))
+        sections.append("\n")
+    sections.append(PACKED_TASK_TEMPLATE.format(count=count))
+    return "".join(sections)
+
+
 # ---------------------------------------------------------------------------
 # Evaluation Entry Point
 # ---------------------------------------------------------------------------
@@ -401,20 +644,24 @@ def judge_submission(
         reference_code,
         artifact,
         deterministic_scores,
+        sanitized_code=strip_comments(submission_code),
     )
 
-    # Try primary model with one retry
+    # Try primary model with one retry, hedging with the first fallback
+    # model when the primary is slow to respond
+    hedge_model = next((m for m in FALLBACK_MODELS if m != model), None)
+    tried_models: set[str] = set()
     for attempt in range(2):
         try:
-            response_text = _invoke_model(
-                SYSTEM_PROMPT, user_prompt, model, api_token
+            parsed, response_text, used_model = _invoke_hedged(
+                SYSTEM_PROMPT, user_prompt, model, hedge_model, api_token,
+                tried_models,
             )
-            parsed = _parse_llm_response(response_text)
 
             if parsed is not None:
                 logger.info(
                     f"LLM evaluation successful "
-                    f"(model={model}, attempt={attempt + 1})"
+                    f"(model={used_model}, attempt={attempt + 1})"
                 )
                 return _build_judgment(parsed, response_text, deterministic_scores)
 
@@ -433,6 +680,8 @@ def judge_submission(
 
     # Try fallback models
     for fb_model in FALLBACK_MODELS:
+        if fb_model in tried_models:
+            continue
         logger.info(f"Trying fallback model: {fb_model}")
         try:
             response_text = _invoke_model(
@@ -450,6 +699,67 @@ def judge_submission(
     return _fallback_judgment(deterministic_scores)
 
 
+def judge_submissions_packed(
+    items: list[dict],
+    k: int = 4,
+    model: str | None = None,
+) -> list[LLMJudgment]:
+    """
+    Judge many submissions, packing up to k of them into each LLM call.
+
+    Each item holds the keyword arguments of judge_submission (without
+    model). Packing amortizes the system prompt and per-call latency over
+    k submissions; keep k small enough that k evidence blocks plus k
+    judgments fit the model context. A group whose response is malformed
+    or errors is re-judged one submission at a time.
+    """
+    model = model or DEFAULT_MODEL
+
+    try:
+        api_token = _get_api_token()
+    except EnvironmentError as e:
+        logger.warning(f"No API token: {e}. Using deterministic scores only.")
+        return [_fallback_judgment(item["deterministic_scores"]) for item in items]
+
+    judgments: list[LLMJudgment] = []
+    for start in range(0, len(items), max(k, 1)):
+        group = items[start:start + max(k, 1)]
+        if len(group) == 1:
+            judgments.append(judge_submission(**group[0], model=model))
+            continue
+
+        parsed = None
+        try:
+            response_text = _invoke_model(
+                SYSTEM_PROMPT,
+                build_packed_prompt(group),
+                model,
+                api_token,
+                max_tokens=800 * len(group),
+            )
+            parsed = _parse_packed_response(response_text, len(group))
+        except Exception as e:
+            logger.warning(f"Packed LLM call failed: {e}")
+
+        if parsed is None:
+            logger.warning(
+                f"Packed judgment of {len(group)} submissions unusable, "
+                f"judging individually"
+            )
+            judgments.extend(
+                judge_submission(**item, model=model) for item in group
+            )
+            continue
+
+        logger.info(f"Packed LLM evaluation successful ({len(group)} submissions)")
+        judgments.extend(
+            _build_judgment(entry, json.dumps(entry), item["deterministic_scores"])
+            for entry, item in zip(parsed, group)
+        )
+
+    return judgments
+
+
 # ---------------------------------------------------------------------------
 # Result Construction
 # ---------------------------------------------------------------------------
@@ -5,34 +5,56 @@ from __future__ import annotations
 import json
 import logging
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 import yaml
 
+try:
+    import ijson
+except ImportError:  # ijson is optional; gold scores are then loaded whole
+    ijson = None
+
 from evaluator.schema import (
     EvaluationResult,
     ExecutionArtifact,
     GoldScore,
     LLMJudgment,
     RubricScores,
+    StaticWarning,
 )
+from evaluator.sandbox import default_batch_workers
 from evaluator.test_runner import run_tests
-from evaluator.static_analysis import run_static_analysis
+from evaluator.static_analysis import run_static_analysis, run_static_analysis_batch
 from evaluator.rubric_engine import compute_deterministic_scores
-from evaluator.llm_judge import judge_submission
+from evaluator.llm_judge import _fallback_judgment, judge_submission
 from evaluator.consistency_checker import (
+    GRADER_DIMENSIONS,
     audit_hallucinations,
     check_consistency,
-    compute_grader_accuracy,
+    compute_grader_accuracy_columns,
 )
+from evaluator import _cache, _json
 
 logger = logging.getLogger(__name__)
 
+# libyaml-backed loader when PyYAML was built with it; pure-Python otherwise
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def load_config(config_path: str = "config.yaml") -> dict:
     """Load pipeline configuration."""
     with open(config_path) as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=_YAML_LOADER)
+
+
+def _scan_names(path: Path) -> set[str]:
+    """Names of the entries in a directory (empty if it does not exist)."""
+    try:
+        with os.scandir(path) as it:
+            return {entry.name for entry in it}
+    except (FileNotFoundError, NotADirectoryError):
+        return set()
 
 
 def discover_problems(problems_dir: str = "problems") -> list[dict]:
@@ -40,30 +62,34 @@ def discover_problems(problems_dir: str = "problems") -> list[dict]:
     problems = []
     base = Path(problems_dir)
 
-    for pdir in sorted(base.iterdir()):
-        if not pdir.is_dir() or pdir.name.startswith("."):
-            continue
+    with os.scandir(base) as it:
+        problem_entries = sorted(
+            (e for e in it if not e.name.startswith(".") and e.is_dir()),
+            key=lambda e: e.name,
+        )
 
-        desc_path = pdir / "description.md"
-        ref_path = pdir / "reference.py"
-        test_path = pdir / "tests.py"
-        subs_dir = pdir / "submissions"
+    for entry in problem_entries:
+        pdir = base / entry.name
+        names = _scan_names(pdir)
 
-        if not all(p.exists() for p in [desc_path, ref_path, test_path]):
+        if not {"description.md", "reference.py", "tests.py"} <= names:
             logger.warning(f"Skipping {pdir.name}: missing required files")
             continue
 
         submissions = []
-        if subs_dir.exists():
-            for sf in sorted(subs_dir.iterdir()):
-                if sf.suffix == ".py":
-                    submissions.append(sf)
+        if "submissions" in names:
+            subs_dir = pdir / "submissions"
+            submissions = [
+                subs_dir / name
+                for name in sorted(_scan_names(subs_dir))
+                if os.path.splitext(name)[1] == ".py"
+            ]
 
         problems.append({
             "id": pdir.name,
-            "description_path": str(desc_path),
-            "reference_path": str(ref_path),
-            "tests_path": str(test_path),
+            "description_path": str(pdir / "description.md"),
+            "reference_path": str(pdir / "reference.py"),
+            "tests_path": str(pdir / "tests.py"),
             "submissions": submissions,
             "dir": str(pdir),
         })
@@ -71,6 +97,20 @@ def discover_problems(problems_dir: str = "problems") -> list[dict]:
     return problems
 
 
+def load_problem_files(problem: dict) -> dict:
+    """
+    Read a problem's description, reference and tests into the problem dict.
+
+    The files are shared by every submission of the problem, so they are
+    read once and reused; calling this again is a no-op.
+    """
+    if "test_code" not in problem:
+        problem["description"] = Path(problem["description_path"]).read_text()
+        problem["reference_code"] = Path(problem["reference_path"]).read_text()
+        problem["test_code"] = Path(problem["tests_path"]).read_text()
+    return problem
+
+
 def get_function_name(problem_id: str) -> str:
     """Map problem ID to the main function name."""
     mapping = {
@@ -95,32 +135,69 @@ def get_expected_complexity(problem_id: str) -> str:
     return mapping.get(problem_id, "O(n)")
 
 
+# Config sections that affect an evaluation result
+_CACHE_CONFIG_SECTIONS = ("sandbox", "llm", "scoring", "static_analysis")
+
+
 def evaluate_single_submission(
     problem: dict,
     submission_path: Path,
     config: dict,
+    bypass_cache: bool = False,
+    static_warnings: list[StaticWarning] | None = None,
 ) -> EvaluationResult:
-    """Evaluate a single submission against a problem."""
+    """
+    Evaluate a single submission against a problem.
+
+    With cache.enabled in the config, results are memoized on disk keyed by
+    the submission, problem files and scoring config. bypass_cache forces a
+    fresh evaluation (the result still refreshes the cache).
+    static_warnings, when given, are the submission's already computed
+    static analysis results (see evaluate_all); otherwise it is linted here.
+    """
     problem_id = problem["id"]
     submission_id = submission_path.stem
 
     logger.info(f"Evaluating {problem_id}/{submission_id}")
 
-    # Read files
-    description = Path(problem["description_path"]).read_text()
-    reference_code = Path(problem["reference_path"]).read_text()
-    test_code = Path(problem["tests_path"]).read_text()
+    # Read files (problem files once per problem)
+    load_problem_files(problem)
+    description = problem["description"]
+    reference_code = problem["reference_code"]
+    test_code = problem["test_code"]
     submission_code = submission_path.read_text()
     function_name = get_function_name(problem_id)
 
+    use_cache = config.get("cache", {}).get("enabled", False)
+    if use_cache:
+        cache_key = _cache.cache_key(
+            problem_id,
+            submission_id,
+            submission_code,
+            test_code,
+            reference_code,
+            description,
+            json.dumps(
+                {k: config.get(k) for k in _CACHE_CONFIG_SECTIONS},
+                sort_keys=True,
+            ),
+        )
+        if not bypass_cache:
+            cached = _cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Using cached result for {problem_id}/{submission_id}")
+                return cached
+
     # Step 1: Run tests in sandbox
     timeout = config.get("sandbox", {}).get("timeout", 3.0)
+    reuse_worker = config.get("sandbox", {}).get("reuse_workers", False)
     test_result, raw_sandbox = run_tests(
-        submission_code, test_code, function_name, timeout
+        submission_code, test_code, function_name, timeout, reuse_worker
     )
 
     # Step 2: Static analysis
-    static_warnings = run_static_analysis(submission_code)
+    if static_warnings is None:
+        static_warnings = run_static_analysis(submission_code, use_cache)
 
     # Step 3: Build execution artifact
     artifact = ExecutionArtifact(
@@ -142,7 +219,16 @@ def evaluate_single_submission(
     llm_model = config.get("llm", {}).get("model", None)
     use_llm = config.get("llm", {}).get("enabled", True)
 
-    if use_llm:
+    # A submission that passes nothing, times out or violates the sandbox
+    # gains no signal from the LLM, so skip the call
+    skip_llm = (
+        test_result.total == 0
+        or test_result.passed == 0
+        or artifact.sandbox_violation
+        or artifact.timeout
+    )
+
+    if use_llm and not skip_llm:
         llm_judgment = judge_submission(
             problem_statement=description,
             submission_code=submission_code,
@@ -152,7 +238,6 @@ def evaluate_single_submission(
             model=llm_model,
         )
     else:
-        from evaluator.llm_judge import _fallback_judgment
         llm_judgment = _fallback_judgment(det_scores)
 
     # Step 6: Hallucination audit
@@ -182,11 +267,82 @@ def evaluate_single_submission(
         hallucination_flags=hallucination_flags,
     )
 
+    # Don't pin a transient LLM outage into the cache
+    llm_failed = (
+        use_llm and not skip_llm
+        and "llm_fallback_mode" in llm_judgment.uncertainty_flags
+    )
+    if use_cache and not llm_failed:
+        _cache.put(cache_key, result)
+
     return result
 
 
+def _evaluate_or_error(
+    problem: dict,
+    sub_path: Path,
+    config: dict,
+    static_warnings: list[StaticWarning] | None = None,
+) -> EvaluationResult:
+    """Evaluate one submission, turning any failure into an error result."""
+    try:
+        return evaluate_single_submission(
+            problem, sub_path, config, static_warnings=static_warnings
+        )
+    except Exception as e:
+        logger.error(f"  {sub_path.stem}: FAILED - {e}")
+        return EvaluationResult(
+            problem_id=problem["id"],
+            submission_id=sub_path.stem,
+            hallucination_flags=[f"Evaluation error: {e}"],
+        )
+
+
+def _log_result(result: EvaluationResult) -> None:
+    logger.info(
+        f"  {result.problem_id}/{result.submission_id}: "
+        f"det={result.deterministic_score:.2f} "
+        f"llm={result.llm_adjusted_score:.2f} "
+        f"final={result.final_score:.2f}"
+    )
+
+
+def _lint_all(
+    tasks: list[tuple[dict, Path]], config: dict
+) -> list[list[StaticWarning] | None]:
+    """
+    Lint every task's submission with one batched ruff run.
+
+    Returns warnings per task, in task order. None marks a submission that
+    could not be read (its evaluation reports the error) or a batch that
+    could not be set up, in which case each submission is linted on its own.
+    """
+    codes: dict[int, str] = {}
+    for i, (_, sub_path) in enumerate(tasks):
+        try:
+            codes[i] = sub_path.read_text()
+        except (OSError, ValueError):
+            pass
+
+    use_cache = config.get("cache", {}).get("enabled", False)
+    try:
+        batch = run_static_analysis_batch(list(codes.values()), use_cache)
+    except OSError as e:
+        logger.warning(f"Batch static analysis failed: {e}")
+        return [None] * len(tasks)
+
+    by_index = dict(zip(codes, batch))
+    return [by_index.get(i) for i in range(len(tasks))]
+
+
 def evaluate_all(config: dict) -> list[EvaluationResult]:
-    """Evaluate all submissions for all problems."""
+    """
+    Evaluate all submissions for all problems.
+
+    Submissions are independent, so they are spread over a process pool
+    (parallel.workers in the config, default: CPU count). Results are
+    returned in problem/submission order regardless of completion order.
+    """
     problems_dir = config.get("paths", {}).get("problems", "problems")
     problems = discover_problems(problems_dir)
 
@@ -196,36 +352,61 @@ def evaluate_all(config: dict) -> list[EvaluationResult]:
 
     logger.info(f"Found {len(problems)} problems")
 
-    all_results = []
-
+    tasks = []
     for problem in problems:
+        try:
+            load_problem_files(problem)
+        except (OSError, ValueError) as e:
+            # Keep its submissions: each one retries the read and comes
+            # back as an error result instead of aborting the whole run
+            logger.error(f"Problem {problem['id']}: cannot read problem files - {e}")
         submissions = problem["submissions"]
         logger.info(
             f"Problem {problem['id']}: {len(submissions)} submissions"
         )
+        tasks.extend((problem, sub_path) for sub_path in submissions)
+
+    lint_results = _lint_all(tasks, config)
+
+    workers = config.get("parallel", {}).get("workers") or default_batch_workers()
+    workers = min(workers, len(tasks)) or 1
 
-        for sub_path in submissions:
-            try:
-                result = evaluate_single_submission(problem, sub_path, config)
-                all_results.append(result)
-                logger.info(
-                    f"  {sub_path.stem}: "
-                    f"det={result.deterministic_score:.2f} "
-                    f"llm={result.llm_adjusted_score:.2f} "
-                    f"final={result.final_score:.2f}"
+    results: dict[int, EvaluationResult] = {}
+    if workers == 1:
+        for i, ((problem, sub_path), warnings) in enumerate(
+            zip(tasks, lint_results)
+        ):
+            results[i] = _evaluate_or_error(problem, sub_path, config, warnings)
+            _log_result(results[i])
+    else:
+        logger.info(f"Evaluating {len(tasks)} submissions on {workers} workers")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(
+                    _evaluate_or_error, problem, sub_path, config, warnings
+                ): i
+                for i, ((problem, sub_path), warnings) in enumerate(
+                    zip(tasks, lint_results)
                 )
-            except Exception as e:
-                logger.error(f"  {sub_path.stem}: FAILED - {e}")
-                # Create error result
-                all_results.append(
-                    EvaluationResult(
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                problem, sub_path = tasks[index]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Worker process died (e.g. killed or unpicklable result)
+                    logger.error(f"  {sub_path.stem}: FAILED - {e}")
+                    result = EvaluationResult(
                         problem_id=problem["id"],
                         submission_id=sub_path.stem,
                         hallucination_flags=[f"Evaluation error: {e}"],
                     )
-                )
+                _log_result(result)
+                results[index] = result
 
-    return all_results
+    # Every task has a result; return them in task order
+    return [results[i] for i in range(len(tasks))]
 
 
 def run_consistency_check(
@@ -245,8 +426,12 @@ def run_consistency_check(
 
             logger.info(f"Consistency check: {problem['id']}/{sub_path.stem}")
 
-            result1 = evaluate_single_submission(problem, sub_path, config)
-            result2 = evaluate_single_submission(problem, sub_path, config)
+            result1 = evaluate_single_submission(
+                problem, sub_path, config, bypass_cache=True
+            )
+            result2 = evaluate_single_submission(
+                problem, sub_path, config, bypass_cache=True
+            )
 
             report = check_consistency(result1, result2)
             report["problem_id"] = problem["id"]
@@ -270,42 +455,35 @@ def run_grader_accuracy(
         logger.warning(f"Gold scores file not found: {gold_path}")
         return {}
 
-    with open(gold_path) as f:
-        gold_data = json.load(f)
-
-    # Build lookup
-    gold_lookup = {}
-    for g in gold_data:
-        key = f"{g['problem_id']}/{g['submission_id']}"
-        gold_lookup[key] = g
-
-    predicted = []
-    gold_list = []
-
-    for r in results:
-        key = f"{r.problem_id}/{r.submission_id}"
-        if key in gold_lookup:
-            g = gold_lookup[key]
-            scores = r.llm_judgment.scores
-            predicted.append({
-                "correctness": scores.correctness,
-                "edge_cases": scores.edge_cases,
-                "complexity": scores.complexity,
-                "style": scores.style,
-                "clarity": scores.clarity,
-                "overall": r.final_score,
-            })
-            gold_list.append({
-                "correctness": g["correctness"],
-                "edge_cases": g["edge_cases"],
-                "complexity": g["complexity"],
-                "style": g["style"],
-                "clarity": g["clarity"],
-                "overall": g["overall"],
-            })
-
-    if not predicted:
+    # Build lookup, streaming entries when ijson is available so only the
+    # lookup itself is held in memory
+    with open(gold_path, "rb") as f:
+        if ijson is not None:
+            gold_data = ijson.items(f, "item", use_float=True)
+        else:
+            gold_data = _json.loads(f.read())
+        gold_lookup = {
+            (g["problem_id"], g["submission_id"]): g for g in gold_data
+        }
+
+    matched = [
+        (r, gold_lookup[(r.problem_id, r.submission_id)])
+        for r in results
+        if (r.problem_id, r.submission_id) in gold_lookup
+    ]
+    if not matched:
         logger.warning("No matching submissions found in gold scores")
         return {}
 
-    return compute_grader_accuracy(predicted, gold_list)
+    # Column per dimension, aligned by submission; every dimension but the
+    # trailing "overall" is a rubric score
+    pred_columns = {
+        dim: [float(getattr(r.llm_judgment.scores, dim)) for r, _ in matched]
+        for dim in GRADER_DIMENSIONS[:-1]
+    }
+    pred_columns["overall"] = [float(r.final_score) for r, _ in matched]
+    gold_columns = {
+        dim: [float(g[dim]) for _, g in matched] for dim in GRADER_DIMENSIONS
+    }
+
+    return compute_grader_accuracy_columns(pred_columns, gold_columns)
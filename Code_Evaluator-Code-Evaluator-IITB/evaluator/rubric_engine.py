@@ -4,6 +4,9 @@ from __future__ import annotations
 
 import ast
 import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
 
 from evaluator.schema import (
     ExecutionArtifact,
@@ -13,6 +16,36 @@ from evaluator.schema import (
 )
 from evaluator.static_analysis import style_score_from_warnings
 
+# Operator with no surrounding spaces, e.g. "a=b" or "x<y"
+_CRAMPED_RE = re.compile(r"[a-zA-Z0-9][=<>!]+[a-zA-Z0-9]")
+# Lines containing these comparison operators are not counted as cramped
+_MULTICHAR_OPS = ("==", "!=", ">=", "<=")
+
+
+@dataclass(frozen=True, slots=True)
+class _TextStats:
+    """Line-level counts shared by the style and clarity heuristics."""
+
+    num_lines: int
+    long_lines: int
+    cramped_lines: int
+    comment_lines: int
+
+
+@lru_cache(maxsize=64)
+def _analyze_text(code: str) -> _TextStats:
+    """Count long, cramped and comment lines in a single pass over the code."""
+    lines = code.strip().split("\n")
+    long_lines = cramped = comments = 0
+    for line in lines:
+        if len(line) > 100:
+            long_lines += 1
+        if _CRAMPED_RE.search(line) and not any(op in line for op in _MULTICHAR_OPS):
+            cramped += 1
+        if line.lstrip().startswith("#"):
+            comments += 1
+    return _TextStats(len(lines), long_lines, cramped, comments)
+
 
 def compute_correctness_score(test_result: TestSuiteResult) -> float:
     """Score correctness based on test pass rate (0-10)."""
@@ -41,28 +74,92 @@ def compute_edge_case_score(test_result: TestSuiteResult) -> float:
         return pass_rate * 8
 
 
-def estimate_complexity(code: str, expected_optimal: str = "O(n)") -> float:
+def _parse(code: str) -> ast.Module | None:
+    """Parse code, returning None on SyntaxError."""
+    try:
+        return ast.parse(code)
+    except SyntaxError:
+        return None
+
+
+# Default for the heuristics' tree argument: no tree was passed, so parse
+# the code. None is a real value there, meaning the code does not parse.
+_UNPARSED: Any = object()
+
+
+def _tree_of(code: str, tree: ast.Module | None) -> ast.Module | None:
+    """Return the given tree, parsing code only if none was passed."""
+    return _parse(code) if tree is _UNPARSED else tree
+
+
+class _AnalyzeVisitor(ast.NodeVisitor):
+    """
+    Single-pass AST analysis for the complexity heuristics.
+
+    Collects maximum loop nesting depth, defined function names and names
+    called directly, so one traversal replaces separate walks.
+    """
+
+    def __init__(self) -> None:
+        self.max_loop_depth = 0
+        self.func_names: set[str] = set()
+        self.called_names: set[str] = set()
+        self._loop_depth = 0
+
+    @property
+    def has_recursion(self) -> bool:
+        return bool(self.func_names & self.called_names)
+
+    def _visit_loop(self, node: ast.For | ast.While) -> None:
+        self._loop_depth += 1
+        self.max_loop_depth = max(self.max_loop_depth, self._loop_depth)
+        self.generic_visit(node)
+        self._loop_depth -= 1
+
+    visit_For = _visit_loop
+    visit_While = _visit_loop
+
+    def visit_FunctionDef(
+        self, node: ast.FunctionDef | ast.AsyncFunctionDef
+    ) -> None:
+        self.func_names.add(node.name)
+        self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Call(self, node: ast.Call) -> None:
+        if isinstance(node.func, ast.Name):
+            self.called_names.add(node.func.id)
+        self.generic_visit(node)
+
+
+def _analyze(tree: ast.AST) -> _AnalyzeVisitor:
+    """Run the single-pass analysis over a parsed tree."""
+    analysis = _AnalyzeVisitor()
+    analysis.visit(tree)
+    return analysis
+
+
+def estimate_complexity(
+    code: str,
+    expected_optimal: str = "O(n)",
+    tree: ast.Module | None = _UNPARSED,
+) -> float:
     """
     Estimate time complexity score based on code patterns.
 
     Returns 0-10 score. Penalizes nested loops when O(n) expected.
+    Pass the result of _parse (a tree, or None if the code does not parse)
+    to skip re-parsing the code.
     """
     score = 10.0
-    nested_loop_depth = 0
-    current_depth = 0
 
-    try:
-        tree = ast.parse(code)
-    except SyntaxError:
+    tree = _tree_of(code, tree)
+    if tree is None:
         return 3.0
 
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.For, ast.While)):
-            current_depth += 1
-            nested_loop_depth = max(nested_loop_depth, current_depth)
-
-    # Reset - we need proper nesting analysis
-    nested_loop_depth = _count_max_loop_nesting(tree)
+    analysis = _analyze(tree)
+    nested_loop_depth = analysis.max_loop_depth
 
     if "O(n)" in expected_optimal or "O(V+E)" in expected_optimal:
         if nested_loop_depth >= 3:
@@ -82,7 +179,7 @@ def estimate_complexity(code: str, expected_optimal: str = "O(n)") -> float:
             score = 10.0
 
     # Check for recursion without memoization
-    has_recursion = _has_recursion(code)
+    has_recursion = analysis.has_recursion
     has_memo = "memo" in code or "cache" in code or "lru_cache" in code or "@cache" in code
     if has_recursion and not has_memo and "O(n)" in expected_optimal:
         score = min(score, 6.0)
@@ -90,84 +187,48 @@ def estimate_complexity(code: str, expected_optimal: str = "O(n)") -> float:
     return round(score, 2)
 
 
-def _count_max_loop_nesting(tree: ast.AST) -> int:
-    """Count maximum nesting depth of loops."""
-    max_depth = 0
-
-    def walk(node: ast.AST, depth: int = 0) -> None:
-        nonlocal max_depth
-        for child in ast.iter_child_nodes(node):
-            if isinstance(child, (ast.For, ast.While)):
-                new_depth = depth + 1
-                max_depth = max(max_depth, new_depth)
-                walk(child, new_depth)
-            else:
-                walk(child, depth)
-
-    walk(tree)
-    return max_depth
-
-
-def _has_recursion(code: str) -> bool:
-    """Check if code likely contains recursion."""
-    try:
-        tree = ast.parse(code)
-    except SyntaxError:
-        return False
-
-    func_names = set()
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            func_names.add(node.name)
-
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Call):
-            if isinstance(node.func, ast.Name) and node.func.id in func_names:
-                return True
-    return False
-
-
 def compute_style_score(
-    code: str, warnings: list[StaticWarning]
+    code: str,
+    warnings: list[StaticWarning],
+    tree: ast.Module | None = _UNPARSED,
 ) -> float:
     """Score code style based on static analysis and heuristics."""
-    lines = code.strip().split("\n")
-    num_lines = len(lines)
+    stats = _analyze_text(code)
 
-    base_score = style_score_from_warnings(warnings, num_lines)
+    base_score = style_score_from_warnings(warnings, stats.num_lines)
 
     # Additional style heuristics
     deductions = 0.0
 
     # Check for single-char variable names (excluding i, j, k, n, x, y)
     acceptable_short = {"i", "j", "k", "n", "x", "y", "v", "e", "f", "s", "t", "q", "_"}
-    try:
-        tree = ast.parse(code)
+    tree = _tree_of(code, tree)
+    if tree is not None:
         for node in ast.walk(tree):
             if isinstance(node, ast.Name) and len(node.id) == 1:
                 if node.id not in acceptable_short:
                     deductions += 0.3
-    except SyntaxError:
+    else:
         deductions += 2.0
 
     # Check for very long lines
-    long_lines = sum(1 for line in lines if len(line) > 100)
-    if long_lines > 0:
-        deductions += min(long_lines * 0.3, 2.0)
+    if stats.long_lines > 0:
+        deductions += min(stats.long_lines * 0.3, 2.0)
 
     # Check for missing spaces around operators (crude check)
-    cramped = sum(1 for line in lines if re.search(r"[a-zA-Z0-9][=<>!]+[a-zA-Z0-9]", line) and "==" not in line and "!=" not in line and ">=" not in line and "<=" not in line)
-    if cramped > 2:
+    if stats.cramped_lines > 2:
         deductions += 1.0
 
     return round(max(0.0, min(10.0, base_score - deductions)), 2)
 
 
-def compute_clarity_score(code: str) -> float:
+def compute_clarity_score(
+    code: str, tree: ast.Module | None = _UNPARSED
+) -> float:
     """Score code clarity based on readability heuristics."""
     score = 8.0
-    lines = code.strip().split("\n")
-    num_lines = len(lines)
+    stats = _analyze_text(code)
+    num_lines = stats.num_lines
 
     # Function length penalty
     if num_lines > 50:
@@ -176,8 +237,8 @@ def compute_clarity_score(code: str) -> float:
         score -= 1.0
 
     # Check for meaningful function/variable names
-    try:
-        tree = ast.parse(code)
+    tree = _tree_of(code, tree)
+    if tree is not None:
         func_count = 0
         short_func_names = 0
         for node in ast.walk(tree):
@@ -188,7 +249,7 @@ def compute_clarity_score(code: str) -> float:
 
         if func_count > 0 and short_func_names / func_count > 0.5:
             score -= 2.0
-    except SyntaxError:
+    else:
         score -= 3.0
 
     # Check for docstrings
@@ -197,8 +258,7 @@ def compute_clarity_score(code: str) -> float:
         score += 1.0
 
     # Has comments (useful ones)
-    comment_lines = sum(1 for line in lines if line.strip().startswith("#"))
-    if comment_lines > 0 and num_lines > 10:
+    if stats.comment_lines > 0 and num_lines > 10:
         score += 0.5
 
     return round(max(0.0, min(10.0, score)), 2)
@@ -211,10 +271,12 @@ def compute_deterministic_scores(
     expected_complexity: str = "O(n)",
 ) -> RubricScores:
     """Compute all deterministic rubric scores."""
+    # Parse once and share the tree across the AST-based heuristics
+    tree = _parse(code)
     return RubricScores(
         correctness=compute_correctness_score(test_result),
         edge_cases=compute_edge_case_score(test_result),
-        complexity=estimate_complexity(code, expected_complexity),
-        style=compute_style_score(code, warnings),
-        clarity=compute_clarity_score(code),
+        complexity=estimate_complexity(code, expected_complexity, tree),
+        style=compute_style_score(code, warnings, tree),
+        clarity=compute_clarity_score(code, tree),
     )
@@ -3,71 +3,185 @@
 from __future__ import annotations
 
 import ast
+import asyncio
+import atexit
+import io
+import json
+import logging
 import os
-import signal
+import queue
+import secrets
+import select
 import subprocess
 import sys
 import tempfile
 import textwrap
-from pathlib import Path
+import threading
+import time
+import tokenize
+from collections import deque
+from functools import lru_cache
 
-BLOCKED_MODULES = {
+logger = logging.getLogger(__name__)
+
+BLOCKED_MODULES = frozenset({
     "os", "sys", "subprocess", "shutil", "socket", "http", "urllib",
     "requests", "ftplib", "smtplib", "ctypes", "importlib", "code",
     "codeop", "compile", "compileall", "py_compile", "zipimport",
     "pkgutil", "multiprocessing", "threading", "signal", "resource",
     "webbrowser", "antigravity", "turtle", "tkinter", "pathlib",
-}
+})
 
-BLOCKED_BUILTINS = {
+BLOCKED_BUILTINS = frozenset({
     "exec", "eval", "compile", "__import__", "open", "input",
     "breakpoint", "exit", "quit",
-}
+})
 
-SAFE_IMPORTS = {
+SAFE_IMPORTS = frozenset({
     "math", "collections", "itertools", "functools", "heapq",
     "bisect", "string", "re", "typing", "dataclasses", "enum",
     "copy", "operator", "statistics",
-}
+})
+
+BLOCKED_METHODS = frozenset({"system", "popen", "exec", "spawn"})
 
 
 class SandboxViolation(Exception):
     """Raised when code violates sandbox rules."""
 
 
+class _SafetyVisitor(ast.NodeVisitor):
+    """Collects sandbox violations in source order."""
+
+    def __init__(self):
+        self.violations: list[str] = []
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            module = alias.name.split(".")[0]
+            if module not in SAFE_IMPORTS:
+                self.violations.append(f"Blocked import: {alias.name}")
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        if node.module:
+            module = node.module.split(".")[0]
+            if module not in SAFE_IMPORTS:
+                self.violations.append(f"Blocked import from: {node.module}")
+
+    def visit_Call(self, node: ast.Call) -> None:
+        func = node.func
+        if isinstance(func, ast.Name):
+            if func.id in BLOCKED_BUILTINS:
+                self.violations.append(f"Blocked builtin call: {func.id}")
+        elif isinstance(func, ast.Attribute):
+            if func.attr in BLOCKED_METHODS:
+                self.violations.append(f"Blocked method call: {func.attr}")
+        self.generic_visit(node)
+
+
 def check_code_safety(code: str) -> list[str]:
     """Static check for dangerous patterns in code. Returns list of violations."""
-    violations = []
+    return list(analyze_and_clean(code)[0])
+
 
+def strip_comments(code: str) -> str:
+    """Remove comments from code to prevent prompt injection via comments."""
+    return analyze_and_clean(code)[1]
+
+
+@lru_cache(maxsize=256)
+def analyze_and_clean(code: str) -> tuple[tuple[str, ...], str]:
+    """
+    Parse code once for both the sandbox and the LLM prompt.
+
+    Returns (safety violations, code with comments and docstrings removed).
+    The syntax tree drives the safety check and locates docstrings and other
+    bare string statements; comments come from the tokenizer. Removed spans
+    are cut out of the original text, so the remaining formatting is kept
+    as written (ast.unparse would normalize it and hide style problems from
+    the judge). Memoized because the sandbox and the judge both ask for the
+    same submission.
+    """
     try:
         tree = ast.parse(code)
     except SyntaxError as e:
-        return [f"SyntaxError: {e}"]
-
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Import):
-            for alias in node.names:
-                module = alias.name.split(".")[0]
-                if module not in SAFE_IMPORTS:
-                    violations.append(f"Blocked import: {alias.name}")
-        elif isinstance(node, ast.ImportFrom):
-            if node.module:
-                module = node.module.split(".")[0]
-                if module not in SAFE_IMPORTS:
-                    violations.append(f"Blocked import from: {node.module}")
-        elif isinstance(node, ast.Call):
-            if isinstance(node.func, ast.Name):
-                if node.func.id in BLOCKED_BUILTINS:
-                    violations.append(f"Blocked builtin call: {node.func.id}")
-            elif isinstance(node.func, ast.Attribute):
-                if node.func.attr in ("system", "popen", "exec", "spawn"):
-                    violations.append(f"Blocked method call: {node.func.attr}")
-
-    return violations
+        return (f"SyntaxError: {e}",), _strip_comments_scan(code)
+
+    visitor = _SafetyVisitor()
+    visitor.visit(tree)
+    violations = tuple(visitor.violations)
+
+    lines = io.StringIO(code).readlines()
+    spans = [
+        _char_span(lines, node)
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Expr)
+        and isinstance(node.value, ast.Constant)
+        and isinstance(node.value.value, str)
+    ]
+    try:
+        spans.extend(
+            (tok.start, tok.end)
+            for tok in tokenize.generate_tokens(io.StringIO(code).readline)
+            if tok.type == tokenize.COMMENT
+        )
+    except (tokenize.TokenError, SyntaxError):
+        return violations, _strip_comments_scan(code)
 
+    return violations, _remove_spans(code, lines, sorted(spans))
 
-def strip_comments(code: str) -> str:
-    """Remove comments from code to prevent prompt injection via comments."""
+
+def _char_span(
+    lines: list[str], node: ast.expr
+) -> tuple[tuple[int, int], tuple[int, int]]:
+    """Node position as (row, char column) pairs; AST columns are UTF-8 bytes."""
+    def char_col(row: int, byte_col: int) -> int:
+        return len(lines[row - 1].encode()[:byte_col].decode())
+
+    return (
+        (node.lineno, char_col(node.lineno, node.col_offset)),
+        (node.end_lineno, char_col(node.end_lineno, node.end_col_offset)),
+    )
+
+
+def _remove_spans(
+    code: str,
+    lines: list[str],
+    spans: list[tuple[tuple[int, int], tuple[int, int]]],
+) -> str:
+    """Cut (start, end) spans out of code, dropping lines they leave empty."""
+    if not spans:
+        return code
+
+    line_starts = [0]
+    for line in lines:
+        line_starts.append(line_starts[-1] + len(line))
+
+    pieces = []
+    touched = set()  # output line numbers that had text removed
+    out_line = 0
+    pos = 0
+    for (srow, scol), (erow, ecol) in spans:
+        start = line_starts[srow - 1] + scol
+        piece = code[pos:start]
+        pieces.append(piece)
+        out_line += piece.count("\n")
+        touched.add(out_line)
+        pos = line_starts[erow - 1] + ecol
+    pieces.append(code[pos:])
+
+    cleaned = []
+    for i, line in enumerate("".join(pieces).split("\n")):
+        if i in touched:
+            line = line.rstrip()
+            if not line:
+                continue
+        cleaned.append(line)
+    return "\n".join(cleaned)
+
+
+def _strip_comments_scan(code: str) -> str:
+    """Line-based fallback for code that does not tokenize."""
     lines = code.split("\n")
     cleaned = []
     in_docstring = False
@@ -111,65 +225,61 @@ def strip_comments(code: str) -> str:
     return "\n".join(cleaned)
 
 
-def run_in_sandbox(
-    code: str,
-    test_code: str,
-    function_name: str,
-    timeout: float = 3.0,
-) -> dict:
+RESULT_MARKER = "===JSON_RESULT==="
+
+
+def _new_result_marker() -> str:
     """
-    Execute submission code + test code in a subprocess sandbox.
+    Per-run result marker for a one-shot runner.
 
-    Returns dict with:
-        stdout, stderr, returncode, execution_time, timeout, sandbox_violation
+    The nonce travels only in the job payload and is never placed anywhere
+    submission code can reach, so a submission cannot print a result that
+    passes for the harness's own.
     """
-    violations = check_code_safety(code)
-    if violations:
-        return {
-            "stdout": "",
-            "stderr": f"Sandbox violations: {'; '.join(violations)}",
-            "returncode": -1,
-            "execution_time": 0.0,
-            "timeout": False,
-            "sandbox_violation": True,
-            "violations": violations,
-        }
+    return f"===JSON_RESULT:{secrets.token_hex(16)}==="
+
 
-    runner_script = textwrap.dedent(f"""\
-        import sys
-        import time
-        import unittest
-        import io
-        import json
+# Test harness executed inside the sandbox subprocess. _run_job runs the
+# submission and its unittest suite in fresh namespaces and returns the
+# structured result dict parsed by the test runner.
+_RUNNER_CORE = textwrap.dedent("""\
+    import io
+    import json
+    import linecache
+    import sys
+    import time
+    import unittest
 
-        # Save references before restricting builtins
-        _safe_exec = exec
-        _safe_compile = compile
-        _safe_open = open
+    # Save references before running any submission code
+    _safe_exec = exec
+    _safe_compile = compile
 
-        # Load files before restricting
-        submission_code = _safe_open(sys.argv[1]).read()
-        test_code = _safe_open(sys.argv[2]).read()
+    # Running via -c puts the working directory on sys.path; drop it so
+    # submissions cannot import whatever happens to live there
+    if sys.path and sys.path[0] == "":
+        del sys.path[0]
 
-        # Now restrict builtins for submission code
-        # (We keep exec/compile for the runner itself but the submission
-        #  code runs in a restricted namespace)
+
+    def _run_job(submission_code, test_code, function_name):
+        # Register sources so tracebacks still show the offending lines
+        for filename, source in (("submission.py", submission_code), ("tests.py", test_code)):
+            linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
 
         # Execute submission code in isolated namespace
-        exec_globals = {{}}
+        exec_globals = {}
         _safe_exec(_safe_compile(submission_code, "submission.py", "exec"), exec_globals)
 
         # Inject the function into test module globals
         # NOTE: __name__ must NOT be "__main__" to prevent unittest.main() from executing
-        test_globals = {{"__name__": "__test_runner__", "unittest": unittest}}
+        test_globals = {"__name__": "__test_runner__", "unittest": unittest}
         for k, v in exec_globals.items():
             if not k.startswith("_"):
                 test_globals[k] = v
 
         # Also inject function name into global scope for the test
-        func = exec_globals.get("{function_name}")
+        func = exec_globals.get(function_name)
         if func:
-            test_globals["{function_name}"] = func
+            test_globals[function_name] = func
 
         _safe_exec(_safe_compile(test_code, "tests.py", "exec"), test_globals)
 
@@ -193,9 +303,9 @@ def run_in_sandbox(
         # Output structured results
         test_results = []
         for test, traceback in result.failures:
-            test_results.append({{"name": str(test), "status": "FAIL", "message": traceback}})
+            test_results.append({"name": str(test), "status": "FAIL", "message": traceback})
         for test, traceback in result.errors:
-            test_results.append({{"name": str(test), "status": "ERROR", "message": traceback}})
+            test_results.append({"name": str(test), "status": "ERROR", "message": traceback})
 
         # Identify passed tests
         all_tests = set()
@@ -206,9 +316,9 @@ def run_in_sandbox(
             tname = str(suite_item)
             all_tests.add(tname)
             if tname not in failed_tests:
-                test_results.append({{"name": tname, "status": "PASS", "message": ""}})
+                test_results.append({"name": tname, "status": "PASS", "message": ""})
 
-        output = {{
+        return {
             "total": result.testsRun,
             "passed": result.testsRun - len(result.failures) - len(result.errors),
             "failed": len(result.failures),
@@ -216,63 +326,583 @@ def run_in_sandbox(
             "elapsed": round(elapsed, 4),
             "details": test_results,
             "test_output": stream.getvalue(),
-        }}
-        print("===JSON_RESULT===")
-        print(json.dumps(output))
-    """)
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        sub_path = os.path.join(tmpdir, "submission.py")
-        test_path = os.path.join(tmpdir, "tests.py")
-        runner_path = os.path.join(tmpdir, "runner.py")
-
-        with open(sub_path, "w") as f:
-            f.write(code)
-        with open(test_path, "w") as f:
-            f.write(test_code)
-        with open(runner_path, "w") as f:
-            f.write(runner_script)
-
-        env = os.environ.copy()
-        env["PYTHONDONTWRITEBYTECODE"] = "1"
+        }
+""")
+
+# One-shot runner: reads one JSON job {code, tests, func, marker} from
+# stdin. The result is written to the stdout saved before the submission
+# ran, and the process exits at once so no finalizer or atexit hook of the
+# submission can print after it.
+_ONESHOT_MAIN = textwrap.dedent("""\
+
+    import os
+
+
+    def _main():
+        job = json.loads(sys.stdin.read())
+        marker = job.pop("marker")
+        out = sys.stdout
+        output = _run_job(job["code"], job["tests"], job["func"])
+        out.write(marker + "\\n" + json.dumps(output) + "\\n")
+        out.flush()
+        sys.stderr.flush()
+        os._exit(0)
+
+
+    _main()
+""")
+
+# Persistent worker: one JSON job per stdin line, one framed reply per job.
+# Submission stdout is captured so it cannot corrupt the reply framing.
+# The timeout derives from KeyboardInterrupt so unittest re-raises it
+# instead of recording it as a test error and moving on.
+_WORKER_MAIN = textwrap.dedent("""\
+
+    import contextlib
+    import signal
+    import traceback as _traceback
+
+
+    class _JobTimeout(KeyboardInterrupt):
+        pass
+
+
+    def _on_alarm(signum, frame):
+        raise _JobTimeout()
+
+
+    signal.signal(signal.SIGALRM, _on_alarm)
+    _out = sys.stdout
+
+    for _line in sys.stdin:
+        _job = json.loads(_line)
+        _captured = io.StringIO()
+        _reply = {"status": "ok", "stdout": "", "stderr": "", "result": None}
+        signal.setitimer(signal.ITIMER_REAL, _job["timeout"])
+        try:
+            with contextlib.redirect_stdout(_captured):
+                _reply["result"] = _run_job(_job["code"], _job["tests"], _job["func"])
+        except _JobTimeout:
+            _reply["status"] = "timeout"
+        except BaseException:
+            _reply["status"] = "error"
+            _reply["stderr"] = _traceback.format_exc()
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        _reply["stdout"] = _captured.getvalue()
+        _out.write("===JSON_RESULT===\\n" + json.dumps(_reply) + "\\n")
+        _out.flush()
+""")
+
+# The persistent worker times jobs out with SIGALRM/setitimer and the parent
+# waits on its pipe with select, none of which exist on Windows
+WORKER_POOL_SUPPORTED = os.name == "posix"
+
+# Extra seconds the parent waits past the job timeout before killing a worker
+_WORKER_GRACE = 1.0
+
+# Command line of a one-shot runner process
+_ONESHOT_ARGS = (sys.executable, "-c", _RUNNER_CORE + _ONESHOT_MAIN)
+
+
+def _private_workdir() -> tempfile.TemporaryDirectory:
+    """
+    Fresh working directory for a runner, removed with everything in it.
+
+    Submission code never runs in a directory shared with other runs or
+    users, so relative paths cannot reach another run's files.
+    """
+    return tempfile.TemporaryDirectory(prefix="sandbox_", ignore_cleanup_errors=True)
+
 
+def _runner_env() -> dict[str, str]:
+    """Environment for runner processes (one-shot and pooled)."""
+    env = os.environ.copy()
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def _oneshot_job(
+    code: str, test_code: str, function_name: str, marker: str
+) -> bytes:
+    """Encode the stdin payload read by _ONESHOT_MAIN."""
+    return json.dumps({
+        "code": code,
+        "tests": test_code,
+        "func": function_name,
+        "marker": marker,
+    }).encode()
+
+
+def _safety_violation(code: str) -> dict | None:
+    """Return a violation result if code fails the safety check, else None."""
+    violations = check_code_safety(code)
+    return _violation_result(violations) if violations else None
+
+
+def _completed_result(
+    stdout: str, stderr: str, returncode: int, marker: str | None
+) -> dict:
+    return {
+        "stdout": stdout,
+        "stderr": stderr,
+        "returncode": returncode,
+        "execution_time": 0.0,
+        "timeout": False,
+        "sandbox_violation": False,
+        "violations": [],
+        "result_marker": marker,
+    }
+
+
+def _violation_result(violations: list[str]) -> dict:
+    return {
+        "stdout": "",
+        "stderr": f"Sandbox violations: {'; '.join(violations)}",
+        "returncode": -1,
+        "execution_time": 0.0,
+        "timeout": False,
+        "sandbox_violation": True,
+        "violations": violations,
+        "result_marker": None,
+    }
+
+
+def _timeout_result(timeout: float) -> dict:
+    return {
+        "stdout": "",
+        "stderr": f"Execution timed out after {timeout}s",
+        "returncode": -1,
+        "execution_time": timeout,
+        "timeout": True,
+        "sandbox_violation": False,
+        "violations": [],
+        "result_marker": None,
+    }
+
+
+def _error_result(message: str) -> dict:
+    return {
+        "stdout": "",
+        "stderr": message,
+        "returncode": -1,
+        "execution_time": 0.0,
+        "timeout": False,
+        "sandbox_violation": False,
+        "violations": [],
+        "result_marker": None,
+    }
+
+
+class SandboxWorkerPool:
+    """
+    Long-lived interpreter processes that run sandbox jobs.
+
+    Interpreter startup is paid once per worker instead of once per
+    submission. Safety checks still run in the parent, so blocked code never
+    reaches a worker. A worker is killed and replaced after a timeout or a
+    crash. Submissions share a worker's interpreter, so isolation between
+    submissions is weaker than with run_in_sandbox's fresh process.
+    POSIX only (see WORKER_POOL_SUPPORTED).
+    """
+
+    def __init__(self, size: int = 1):
+        if not WORKER_POOL_SUPPORTED:
+            raise RuntimeError("SandboxWorkerPool requires a POSIX platform")
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: queue.SimpleQueue[subprocess.Popen] = queue.SimpleQueue()
+        # Each worker keeps its own working directory until it is discarded
+        self._workers: dict[subprocess.Popen, tempfile.TemporaryDirectory] = {}
+        self._lock = threading.Lock()
+
+    def _spawn(self) -> subprocess.Popen:
+        workdir = _private_workdir()
         try:
-            proc = subprocess.run(
-                [sys.executable, runner_path, sub_path, test_path],
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                cwd=tmpdir,
-                env=env,
+            proc = subprocess.Popen(
+                [sys.executable, "-c", _RUNNER_CORE + _WORKER_MAIN],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                cwd=workdir.name,
+                env=_runner_env(),
             )
+        except BaseException:
+            workdir.cleanup()
+            raise
+        with self._lock:
+            self._workers[proc] = workdir
+        return proc
+
+    def _discard(self, proc: subprocess.Popen) -> None:
+        proc.kill()
+        proc.wait()
+        with self._lock:
+            workdir = self._workers.pop(proc, None)
+        if workdir is not None:
+            workdir.cleanup()
+
+    @staticmethod
+    def _read_reply(proc: subprocess.Popen, deadline: float) -> dict | None:
+        """Read one framed reply; None if the deadline passes first."""
+        marker = (RESULT_MARKER + "\n").encode()
+        fd = proc.stdout.fileno()
+        buf = bytearray()
+        while True:
+            start = buf.find(marker)
+            if start >= 0:
+                end = buf.find(b"\n", start + len(marker))
+                if end >= 0:
+                    return json.loads(bytes(buf[start + len(marker):end]))
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                return None
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise EOFError("sandbox worker exited unexpectedly")
+            buf += chunk
+
+    def run(
+        self,
+        code: str,
+        test_code: str,
+        function_name: str,
+        timeout: float = 3.0,
+    ) -> dict:
+        """Run one job on an idle worker; same result shape as run_in_sandbox."""
+        if blocked := _safety_violation(code):
+            return blocked
+
+        job = json.dumps({
+            "code": code,
+            "tests": test_code,
+            "func": function_name,
+            "timeout": timeout,
+        })
+
+        with self._slots:
+            try:
+                proc = self._idle.get_nowait()
+            except queue.Empty:
+                proc = self._spawn()
+
+            start = time.monotonic()
+            try:
+                proc.stdin.write((job + "\n").encode())
+                proc.stdin.flush()
+                reply = self._read_reply(proc, start + timeout + _WORKER_GRACE)
+            except (OSError, EOFError, ValueError) as e:
+                self._discard(proc)
+                return _error_result(f"Sandbox worker failed: {e}")
+
+            if reply is None or reply["status"] == "timeout":
+                self._discard(proc)
+                return _timeout_result(timeout)
+
+            self._idle.put(proc)
+
+        if reply["status"] == "error":
+            return _completed_result(reply["stdout"], reply["stderr"], 1, None)
+        # Re-frame under a fresh marker, as the one-shot runner does, so
+        # captured submission output cannot pass for the result
+        marker = _new_result_marker()
+        return _completed_result(
+            reply["stdout"]
+            + marker + "\n"
+            + json.dumps(reply["result"]) + "\n",
+            "",
+            0,
+            marker,
+        )
+
+    def close(self) -> None:
+        """Terminate all worker processes."""
+        with self._lock:
+            workers = list(self._workers)
+        for proc in workers:
+            self._discard(proc)
+
+
+_worker_pool: SandboxWorkerPool | None = None
+
+
+def get_worker_pool() -> SandboxWorkerPool:
+    """Return this process's shared worker pool, creating it on first use."""
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = SandboxWorkerPool()
+        atexit.register(_worker_pool.close)
+    return _worker_pool
+
+
+@lru_cache(maxsize=None)
+def _warn_no_worker_pool() -> None:
+    logger.warning(
+        "sandbox.reuse_workers is not supported on this platform; "
+        "running each submission in a fresh interpreter"
+    )
+
+
+def default_batch_workers() -> int:
+    """Sandboxes to run at once by default: all CPUs but two, at least one."""
+    return max(1, (os.cpu_count() or 1) - 2)
 
-            return {
-                "stdout": proc.stdout,
-                "stderr": proc.stderr,
-                "returncode": proc.returncode,
-                "execution_time": 0.0,
-                "timeout": False,
-                "sandbox_violation": False,
-                "violations": [],
-            }
 
-        except subprocess.TimeoutExpired:
-            return {
-                "stdout": "",
-                "stderr": f"Execution timed out after {timeout}s",
-                "returncode": -1,
-                "execution_time": timeout,
-                "timeout": True,
-                "sandbox_violation": False,
-                "violations": [],
-            }
+def run_in_sandbox(
+    code: str,
+    test_code: str,
+    function_name: str,
+    timeout: float = 3.0,
+    reuse_worker: bool = False,
+) -> dict:
+    """
+    Execute submission code + test code in a subprocess sandbox.
+
+    With reuse_worker, the job runs on this process's persistent
+    SandboxWorkerPool instead of a fresh interpreter. Where the pool is not
+    supported (Windows), reuse_worker is ignored with a one-time warning.
+
+    Returns dict with:
+        stdout, stderr, returncode, execution_time, timeout, sandbox_violation,
+        violations, result_marker (the marker preceding the harness result in
+        stdout; None when no harness ran)
+    """
+    if reuse_worker:
+        if WORKER_POOL_SUPPORTED:
+            return get_worker_pool().run(code, test_code, function_name, timeout)
+        _warn_no_worker_pool()
+
+    if blocked := _safety_violation(code):
+        return blocked
+
+    marker = _new_result_marker()
+    job = _oneshot_job(code, test_code, function_name, marker)
+    with _private_workdir() as workdir:
+        try:
+            proc = subprocess.Popen(
+                _ONESHOT_ARGS,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=workdir,
+                env=_runner_env(),
+            )
+        except Exception as e:
+            return _error_result(str(e))
+
+        try:
+            streams = _stream_until_result(proc, job, marker, timeout)
+        except Exception as e:
+            proc.kill()
+            proc.wait()
+            return _error_result(str(e))
+
+    if streams is None:
+        return _timeout_result(timeout)
+
+    stdout, stderr = streams
+    return _completed_result(stdout, stderr, proc.returncode, marker)
+
+
+async def run_in_sandbox_async(
+    code: str,
+    test_code: str,
+    function_name: str,
+    timeout: float = 3.0,
+) -> dict:
+    """
+    asyncio counterpart of run_in_sandbox (one-shot runner only).
+
+    The runner process is supervised by the event loop, so many sandboxes
+    can be awaited concurrently from one thread. Returns the same dict.
+    """
+    if blocked := _safety_violation(code):
+        return blocked
+
+    marker = _new_result_marker()
+    job = _oneshot_job(code, test_code, function_name, marker)
+    output = _RunnerOutput(marker)
+    with _private_workdir() as workdir:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *_ONESHOT_ARGS,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=workdir,
+                env=_runner_env(),
+            )
+        except Exception as e:
+            return _error_result(str(e))
+
+        async def send_job() -> None:
+            try:
+                proc.stdin.write(job)
+                await proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            proc.stdin.close()
+
+        async def pump(stream: asyncio.StreamReader, feed) -> None:
+            while chunk := await stream.read(65536):
+                feed(chunk)
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    send_job(),
+                    pump(proc.stdout, output.feed_stdout),
+                    pump(proc.stderr, output.feed_stderr),
+                    proc.wait(),
+                ),
+                timeout,
+            )
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return _timeout_result(timeout)
         except Exception as e:
-            return {
-                "stdout": "",
-                "stderr": str(e),
-                "returncode": -1,
-                "execution_time": 0.0,
-                "timeout": False,
-                "sandbox_violation": False,
-                "violations": [],
-            }
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            return _error_result(str(e))
+
+    stdout, stderr = output.finish()
+    return _completed_result(stdout, stderr, proc.returncode, marker)
+
+
+# Bounds on what _RunnerOutput keeps of a chatty submission's output
+_STDOUT_TAIL_LINES = 200
+_LINE_LIMIT = 4096
+_RESULT_LIMIT = 16 * 1024 * 1024
+_STDERR_LIMIT = 64 * 1024
+
+
+class _RunnerOutput:
+    """
+    Bounded accumulator for a one-shot runner's stdout and stderr.
+
+    The first line ending in the run's result marker and the result line
+    after it are kept, the result line up to _RESULT_LIMIT bytes (a longer
+    one is dropped). The harness exits right after its result, so anything
+    printed later was not written by it: the last _LINE_LIMIT bytes of it
+    are kept after the result, where they make the test runner reject the
+    run. Earlier stdout is kept as a tail of _STDOUT_TAIL_LINES lines, each
+    cut to _LINE_LIMIT bytes, and stderr up to _STDERR_LIMIT bytes, so
+    memory stays bounded however much the submission prints.
+    """
+
+    def __init__(self, marker: str) -> None:
+        self._marker = marker.encode()
+        self._tail: deque[bytes] = deque(maxlen=_STDOUT_TAIL_LINES)
+        self._partial = bytearray()
+        self._result_lines: list[bytes] = []  # [marker line, result line]
+        self._trailing = bytearray()  # stdout after the result line
+        self._stderr = bytearray()
+
+    def _take_line(self, line: bytes) -> None:
+        if not self._result_lines:
+            # Unflushed submission output may share the marker's line
+            if line.endswith(self._marker):
+                self._result_lines.append(line[-_LINE_LIMIT:])
+            else:
+                self._tail.append(line[-_LINE_LIMIT:])
+        elif len(self._result_lines) == 1:
+            self._result_lines.append(line if len(line) <= _RESULT_LIMIT else b"")
+        else:
+            self._add_trailing(line + b"\n")
+
+    def _add_trailing(self, data: bytes) -> None:
+        self._trailing += data[-_LINE_LIMIT:]
+        del self._trailing[:-_LINE_LIMIT]
+
+    def feed_stdout(self, chunk: bytes) -> None:
+        self._partial += chunk
+        if b"\n" in chunk:
+            lines = self._partial.split(b"\n")
+            self._partial = bytearray(lines.pop())
+            for line in lines:
+                self._take_line(bytes(line))
+
+        awaiting_result = len(self._result_lines) == 1
+        if len(self._partial) > (_RESULT_LIMIT if awaiting_result else _LINE_LIMIT):
+            if awaiting_result:
+                # Too big to be a result: drop it, keep the end as trailing
+                self._result_lines.append(b"")
+            del self._partial[:-_LINE_LIMIT]
+
+    def feed_stderr(self, chunk: bytes) -> None:
+        self._stderr += chunk[:_STDERR_LIMIT - len(self._stderr)]
+
+    def finish(self) -> tuple[str, str]:
+        """Flush any unterminated line and return (stdout, stderr)."""
+        if len(self._result_lines) == 2:
+            self._add_trailing(bytes(self._partial))
+        elif self._partial:
+            self._take_line(bytes(self._partial))
+        self._partial = bytearray()
+        out_lines = list(self._tail) + self._result_lines
+        stdout = b"\n".join(out_lines) + (b"\n" if out_lines else b"")
+        stdout += self._trailing
+        return (
+            stdout.decode(errors="replace"),
+            self._stderr.decode(errors="replace"),
+        )
+
+
+def _stream_until_result(
+    proc: subprocess.Popen, job: bytes, marker: str, timeout: float
+) -> tuple[str, str] | None:
+    """
+    Feed the job to a one-shot runner and collect its output as it streams.
+
+    Each pipe is served by its own thread, as subprocess.communicate does,
+    which works on every platform. Output is accumulated in a _RunnerOutput,
+    so memory stays bounded. Returns (stdout, stderr), or None after killing
+    the process on timeout.
+    """
+    deadline = time.monotonic() + timeout
+    output = _RunnerOutput(marker)
+
+    def send_job() -> None:
+        try:
+            proc.stdin.write(job)
+            proc.stdin.close()
+        except OSError:
+            pass  # The runner exited without reading the whole job
+
+    def pump(stream, feed) -> None:
+        while chunk := stream.read1(65536):
+            feed(chunk)
+
+    threads = [
+        threading.Thread(target=send_job, daemon=True),
+        threading.Thread(target=pump, args=(proc.stdout, output.feed_stdout), daemon=True),
+        threading.Thread(target=pump, args=(proc.stderr, output.feed_stderr), daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    timed_out = False
+    for thread in threads:
+        thread.join(max(deadline - time.monotonic(), 0.0))
+        timed_out = timed_out or thread.is_alive()
+    if timed_out:
+        proc.kill()
+        proc.wait()
+    else:
+        try:
+            proc.wait(timeout=max(deadline - time.monotonic(), 0.0) + _WORKER_GRACE)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+    # Killing the runner ends the pipes; close each once its thread is done
+    for thread, stream in zip(threads, (proc.stdin, proc.stdout, proc.stderr)):
+        thread.join(_WORKER_GRACE)
+        if not thread.is_alive():
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+    return None if timed_out else output.finish()
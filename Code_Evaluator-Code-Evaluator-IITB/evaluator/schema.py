@@ -2,20 +2,29 @@
 
 from __future__ import annotations
 
-import json
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field
 from typing import Any
 
+from evaluator import _json
 
-@dataclass
+
+@dataclass(slots=True)
 class TestResult:
     test_name: str
     passed: bool
     message: str = ""
     execution_time: float = 0.0
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "test_name": self.test_name,
+            "passed": self.passed,
+            "message": self.message,
+            "execution_time": self.execution_time,
+        }
+
 
-@dataclass
+@dataclass(slots=True)
 class TestSuiteResult:
     total: int = 0
     passed: int = 0
@@ -28,8 +37,18 @@ class TestSuiteResult:
         if self.total > 0:
             self.pass_rate = round(self.passed / self.total, 4)
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "total": self.total,
+            "passed": self.passed,
+            "failed": self.failed,
+            "errors": self.errors,
+            "results": [r.to_dict() for r in self.results],
+            "pass_rate": self.pass_rate,
+        }
 
-@dataclass
+
+@dataclass(slots=True)
 class StaticWarning:
     rule: str
     message: str
@@ -37,8 +56,17 @@ class StaticWarning:
     column: int = 0
     severity: str = "warning"
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "rule": self.rule,
+            "message": self.message,
+            "line": self.line,
+            "column": self.column,
+            "severity": self.severity,
+        }
 
-@dataclass
+
+@dataclass(slots=True)
 class ExecutionArtifact:
     test_results: TestSuiteResult = field(default_factory=TestSuiteResult)
     static_warnings: list[StaticWarning] = field(default_factory=list)
@@ -47,8 +75,18 @@ class ExecutionArtifact:
     sandbox_violation: bool = False
     timeout: bool = False
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "test_results": self.test_results.to_dict(),
+            "static_warnings": [w.to_dict() for w in self.static_warnings],
+            "runtime_errors": self.runtime_errors,
+            "execution_time": self.execution_time,
+            "sandbox_violation": self.sandbox_violation,
+            "timeout": self.timeout,
+        }
+
 
-@dataclass
+@dataclass(slots=True)
 class RubricScores:
     correctness: float = 0.0
     edge_cases: float = 0.0
@@ -56,6 +94,15 @@ class RubricScores:
     style: float = 0.0
     clarity: float = 0.0
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "correctness": self.correctness,
+            "edge_cases": self.edge_cases,
+            "complexity": self.complexity,
+            "style": self.style,
+            "clarity": self.clarity,
+        }
+
     def overall(self) -> float:
         weights = {
             "correctness": 0.35,
@@ -74,7 +121,7 @@ class RubricScores:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class LLMJudgment:
     scores: RubricScores = field(default_factory=RubricScores)
     issues: list[str] = field(default_factory=list)
@@ -84,8 +131,19 @@ class LLMJudgment:
     uncertainty_flags: list[str] = field(default_factory=list)
     raw_response: str = ""
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "scores": self.scores.to_dict(),
+            "issues": list(self.issues),
+            "suggestions": list(self.suggestions),
+            "evidence_used": list(self.evidence_used),
+            "confidence": self.confidence,
+            "uncertainty_flags": list(self.uncertainty_flags),
+            "raw_response": self.raw_response,
+        }
+
 
-@dataclass
+@dataclass(slots=True)
 class EvaluationResult:
     problem_id: str = ""
     submission_id: str = ""
@@ -97,13 +155,40 @@ class EvaluationResult:
     hallucination_flags: list[str] = field(default_factory=list)
 
     def to_dict(self) -> dict[str, Any]:
-        return asdict(self)
+        return {
+            "problem_id": self.problem_id,
+            "submission_id": self.submission_id,
+            "deterministic_score": self.deterministic_score,
+            "llm_adjusted_score": self.llm_adjusted_score,
+            "final_score": self.final_score,
+            "execution_artifact": self.execution_artifact.to_dict(),
+            "llm_judgment": self.llm_judgment.to_dict(),
+            "hallucination_flags": list(self.hallucination_flags),
+        }
 
     def to_json(self, indent: int = 2) -> str:
-        return json.dumps(self.to_dict(), indent=indent)
-
-
-@dataclass
+        return _json.dumps(self.to_dict(), indent=indent)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> EvaluationResult:
+        """Rebuild a result (and its nested records) from to_dict() output."""
+        artifact = dict(data["execution_artifact"])
+        suite = dict(artifact["test_results"])
+        suite["results"] = [TestResult(**r) for r in suite["results"]]
+        artifact["test_results"] = TestSuiteResult(**suite)
+        artifact["static_warnings"] = [
+            StaticWarning(**w) for w in artifact["static_warnings"]
+        ]
+        judgment = dict(data["llm_judgment"])
+        judgment["scores"] = RubricScores(**judgment["scores"])
+        return cls(**{
+            **data,
+            "execution_artifact": ExecutionArtifact(**artifact),
+            "llm_judgment": LLMJudgment(**judgment),
+        })
+
+
+@dataclass(slots=True)
 class GoldScore:
     problem_id: str
     submission_id: str
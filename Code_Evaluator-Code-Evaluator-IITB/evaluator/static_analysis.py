@@ -2,81 +2,246 @@
 
 from __future__ import annotations
 
-import json
+import bisect
 import os
 import subprocess
 import sys
 import tempfile
+from collections import Counter
+from functools import cache, lru_cache
+from importlib import metadata
 
+from evaluator import _cache, _json
 from evaluator.schema import StaticWarning
 
+RUFF_SELECT = "E,W,F,C,N,B"
 
-def run_ruff(code: str) -> list[StaticWarning]:
-    """Run ruff linter on code and return warnings."""
-    warnings = []
 
-    with tempfile.NamedTemporaryFile(
-        mode="w", suffix=".py", delete=False
-    ) as f:
-        f.write(code)
-        f.flush()
-        tmp_path = f.name
+@cache
+def _ruff_command() -> tuple[str, ...]:
+    """
+    Command prefix that runs ruff, resolved once per process.
+
+    Executing the ruff binary directly skips starting a Python interpreter
+    just to locate it; `python -m ruff` is kept as the fallback.
+    """
+    try:
+        from ruff.__main__ import find_ruff_bin
+
+        return (os.fsdecode(find_ruff_bin()),)
+    except (ImportError, FileNotFoundError):
+        return (sys.executable, "-m", "ruff")
+
 
+class _RuffUnavailable(Exception):
+    """ruff could not lint (missing, timed out or failed); never cached."""
+
+
+@cache
+def _ruff_version() -> str:
     try:
-        result = subprocess.run(
-            [
-                sys.executable, "-m", "ruff", "check",
-                "--output-format", "json",
-                "--select", "E,W,F,C,N,B",
-                tmp_path,
-            ],
-            capture_output=True,
-            text=True,
-            timeout=10,
+        return metadata.version("ruff")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def _tool_error() -> list[StaticWarning]:
+    return [
+        StaticWarning(
+            rule="TOOL_ERROR",
+            message="ruff not available, failed or timed out",
+            severity="info",
         )
+    ]
 
-        if result.stdout.strip():
-            try:
-                issues = json.loads(result.stdout)
-                for issue in issues:
-                    warnings.append(
-                        StaticWarning(
-                            rule=issue.get("code", "unknown"),
-                            message=issue.get("message", ""),
-                            line=issue.get("location", {}).get("row", 0),
-                            column=issue.get("location", {}).get("column", 0),
-                            severity="warning",
-                        )
-                    )
-            except json.JSONDecodeError:
-                pass
-
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        warnings.append(
-            StaticWarning(
-                rule="TOOL_ERROR",
-                message="ruff not available or timed out",
-                severity="info",
+
+def run_ruff(code: str, use_disk_cache: bool = False) -> list[StaticWarning]:
+    """
+    Run ruff linter on code and return warnings.
+
+    Results are cached in memory by code. With use_disk_cache (the
+    pipeline's cache.enabled setting) they are also cached on disk by code
+    hash and ruff version. Failed runs are never cached.
+    """
+    try:
+        return list(_cached_ruff(code, use_disk_cache))
+    except _RuffUnavailable:
+        return _tool_error()
+
+
+def _ruff_cache_key(code: str) -> str:
+    return _cache.cache_key(_ruff_version(), RUFF_SELECT, code)
+
+
+@lru_cache(maxsize=4096)
+def _cached_ruff(code: str, use_disk_cache: bool) -> tuple[StaticWarning, ...]:
+    if use_disk_cache:
+        stored = _cache.load("ruff", _ruff_cache_key(code))
+        if stored is not None:
+            return tuple(StaticWarning(**w) for w in stored)
+
+    warnings = _lint(code)
+    if use_disk_cache:
+        _cache.store("ruff", _ruff_cache_key(code), [w.to_dict() for w in warnings])
+    return tuple(warnings)
+
+
+def _lint(code: str) -> list[StaticWarning]:
+    """Run ruff on code; raises _RuffUnavailable if it cannot run."""
+    return _to_warnings(
+        _ruff_check(["--stdin-filename", "submission.py", "-"], stdin=code)
+    )
+
+
+def _ruff_check(
+    targets: list[str], stdin: str | None = None, timeout: float = 10
+) -> list[dict]:
+    """
+    Run one `ruff check` over targets (paths, or stdin options) and return
+    its JSON issues.
+
+    ruff runs from a private, empty directory so no project configuration is
+    picked up from the caller's tree or a shared temp directory. Raises _RuffUnavailable unless ruff finished
+    normally (exit 0: clean, 1: issues found) with a JSON issue list, so a
+    failed run is never mistaken for a clean one.
+    """
+    try:
+        with tempfile.TemporaryDirectory(prefix="ruff_") as workdir:
+            result = subprocess.run(
+                [
+                    *_ruff_command(), "check",
+                    "--output-format", "json",
+                    "--select", RUFF_SELECT,
+                    *targets,
+                ],
+                input=stdin,
+                capture_output=True,
+                text=True,
+                cwd=workdir,
+                timeout=timeout,
             )
-        )
-    finally:
-        os.unlink(tmp_path)
+    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+        raise _RuffUnavailable() from e
+
+    if result.returncode not in (0, 1):
+        raise _RuffUnavailable(result.stderr.strip())
+    try:
+        issues = _json.loads(result.stdout)
+    except _json.JSONDecodeError as e:
+        raise _RuffUnavailable("unparseable ruff output") from e
+    if not isinstance(issues, list):
+        raise _RuffUnavailable("unexpected ruff output")
+    return issues
+
+
+# Shared stand-in for a missing "location"; never mutated
+_EMPTY: dict = {}
 
+
+def _to_warnings(issues: list[dict]) -> list[StaticWarning]:
+    # Positional arguments, in StaticWarning's field order (rule, message,
+    # line, column, severity): cheaper than keywords for large issue lists
+    mk_warning = StaticWarning
+    warnings = []
+    for issue in issues:
+        loc = issue.get("location") or _EMPTY
+        warnings.append(mk_warning(
+            issue.get("code", "unknown"),
+            issue.get("message", ""),
+            loc.get("row", 0),
+            loc.get("column", 0),
+            "warning",
+        ))
     return warnings
 
 
-def run_static_analysis(code: str) -> list[StaticWarning]:
+# Files per ruff invocation in run_ruff_batch (keeps argv bounded)
+_RUFF_BATCH_SIZE = 500
+
+
+def run_ruff_batch(
+    codes: list[str], use_disk_cache: bool = False
+) -> list[list[StaticWarning]]:
+    """
+    Lint many submissions with as few ruff processes as possible.
+
+    ruff starts once per _RUFF_BATCH_SIZE files instead of once per
+    submission, and lints the files of a batch on its own threads. With
+    use_disk_cache, cached results are reused and new ones stored, as in
+    run_ruff. Results come back in input order.
+    """
+    keys = [_ruff_cache_key(code) for code in codes] if use_disk_cache else []
+    results: list[list[StaticWarning] | None] = [None] * len(codes)
+    for i, key in enumerate(keys):
+        stored = _cache.load("ruff", key)
+        if stored is not None:
+            results[i] = [StaticWarning(**w) for w in stored]
+
+    missing = [i for i, r in enumerate(results) if r is None]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for start in range(0, len(missing), _RUFF_BATCH_SIZE):
+            chunk = missing[start:start + _RUFF_BATCH_SIZE]
+            paths = {}
+            for i in chunk:
+                path = os.path.join(tmpdir, f"submission_{i}.py")
+                with open(path, "w") as f:
+                    f.write(codes[i])
+                paths[os.path.basename(path)] = i
+
+            by_index: dict[int, list[dict]] = {i: [] for i in chunk}
+            try:
+                issues = _ruff_check(
+                    sorted(os.path.join(tmpdir, n) for n in paths),
+                    # The usual 10s for one file, a little more per extra file
+                    timeout=10 + 0.05 * (len(paths) - 1),
+                )
+            except _RuffUnavailable:
+                # Re-linting each file on its own would only repeat the
+                # failure, one timeout at a time
+                for i in chunk:
+                    results[i] = _tool_error()
+                continue
+            for issue in issues:
+                index = paths.get(os.path.basename(issue.get("filename", "")))
+                if index is not None:
+                    by_index[index].append(issue)
+
+            for i in chunk:
+                results[i] = _to_warnings(by_index[i])
+                if use_disk_cache:
+                    _cache.store("ruff", keys[i], [w.to_dict() for w in results[i]])
+
+    return results
+
+
+def run_static_analysis(
+    code: str, use_disk_cache: bool = False
+) -> list[StaticWarning]:
     """Run all static analysis tools on code."""
-    warnings = run_ruff(code)
+    warnings = run_ruff(code, use_disk_cache)
     return warnings
 
 
+def run_static_analysis_batch(
+    codes: list[str], use_disk_cache: bool = False
+) -> list[list[StaticWarning]]:
+    """
+    Run static analysis on many submissions at once.
+
+    Results come back in input order.
+    """
+    return run_ruff_batch(codes, use_disk_cache)
+
+
 def count_by_severity(warnings: list[StaticWarning]) -> dict[str, int]:
     """Count warnings by severity."""
-    counts: dict[str, int] = {}
-    for w in warnings:
-        counts[w.severity] = counts.get(w.severity, 0) + 1
-    return counts
+    return dict(Counter(w.severity for w in warnings))
+
+
+# Warning-density buckets: a density below _DENSITY_THRESHOLDS[i] scores
+# _DENSITY_SCORES[i]; anything at or above the last threshold scores 1
+_DENSITY_THRESHOLDS = (0.05, 0.1, 0.2, 0.3, 0.5)
+_DENSITY_SCORES = (9.0, 8.0, 6.0, 4.0, 2.0, 1.0)
 
 
 def style_score_from_warnings(warnings: list[StaticWarning], code_lines: int) -> float:
@@ -88,20 +253,9 @@ def style_score_from_warnings(warnings: list[StaticWarning], code_lines: int) ->
     if code_lines == 0:
         return 5.0
 
-    warning_count = len([w for w in warnings if w.rule != "TOOL_ERROR"])
+    warning_count = sum(1 for w in warnings if w.rule != "TOOL_ERROR")
     warning_density = warning_count / max(code_lines, 1)
 
     if warning_density == 0:
         return 10.0
-    elif warning_density < 0.05:
-        return 9.0
-    elif warning_density < 0.1:
-        return 8.0
-    elif warning_density < 0.2:
-        return 6.0
-    elif warning_density < 0.3:
-        return 4.0
-    elif warning_density < 0.5:
-        return 2.0
-    else:
-        return 1.0
+    return _DENSITY_SCORES[bisect.bisect_right(_DENSITY_THRESHOLDS, warning_density)]
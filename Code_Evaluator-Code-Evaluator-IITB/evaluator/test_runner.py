@@ -2,23 +2,37 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
 import re
 
+from evaluator import _json
 from evaluator.schema import TestResult, TestSuiteResult
-from evaluator.sandbox import run_in_sandbox
+from evaluator.sandbox import (
+    default_batch_workers,
+    run_in_sandbox,
+    run_in_sandbox_async,
+)
 
 
-def extract_json_result(stdout: str) -> dict | None:
-    """Extract JSON result from sandbox output."""
-    marker = "===JSON_RESULT==="
-    if marker in stdout:
-        json_str = stdout.split(marker, 1)[1].strip()
-        try:
-            return json.loads(json_str)
-        except json.JSONDecodeError:
-            return None
-    return None
+def extract_json_result(stdout: str, marker: str | None) -> dict | None:
+    """
+    Extract the harness's JSON result from sandbox output.
+
+    marker is the run's result marker (the sandbox result's "result_marker").
+    Only its first occurrence counts, and the result must be the only thing
+    after it: trailing output means something other than the harness wrote
+    there, so the run is rejected rather than trusted.
+    """
+    if marker is None:
+        return None
+    idx = stdout.find(marker)
+    if idx < 0:
+        return None
+    try:
+        # JSON parsers skip surrounding whitespace but reject extra data
+        return _json.loads(stdout[idx + len(marker):])
+    except _json.JSONDecodeError:
+        return None
 
 
 def run_tests(
@@ -26,14 +40,34 @@ def run_tests(
     test_code: str,
     function_name: str,
     timeout: float = 3.0,
+    reuse_worker: bool = False,
 ) -> tuple[TestSuiteResult, dict]:
     """
     Run submission against tests in sandbox.
 
     Returns (TestSuiteResult, raw_sandbox_output).
     """
-    raw = run_in_sandbox(submission_code, test_code, function_name, timeout)
+    raw = run_in_sandbox(
+        submission_code, test_code, function_name, timeout, reuse_worker
+    )
+    return _suite_from_raw(raw, timeout), raw
+
+
+async def run_tests_async(
+    submission_code: str,
+    test_code: str,
+    function_name: str,
+    timeout: float = 3.0,
+) -> tuple[TestSuiteResult, dict]:
+    """asyncio counterpart of run_tests; always uses a one-shot sandbox."""
+    raw = await run_in_sandbox_async(
+        submission_code, test_code, function_name, timeout
+    )
+    return _suite_from_raw(raw, timeout), raw
+
 
+def _suite_from_raw(raw: dict, timeout: float) -> TestSuiteResult:
+    """Build a TestSuiteResult from a sandbox result dict."""
     result = TestSuiteResult()
 
     if raw["timeout"]:
@@ -47,7 +81,7 @@ def run_tests(
             )
         ]
         result.compute_pass_rate()
-        return result, raw
+        return result
 
     if raw["sandbox_violation"]:
         result.total = 1
@@ -60,9 +94,9 @@ def run_tests(
             )
         ]
         result.compute_pass_rate()
-        return result, raw
+        return result
 
-    parsed = extract_json_result(raw["stdout"])
+    parsed = extract_json_result(raw["stdout"], raw["result_marker"])
 
     if parsed is None:
         result.total = 1
@@ -76,22 +110,45 @@ def run_tests(
             )
         ]
         result.compute_pass_rate()
-        return result, raw
+        return result
 
     result.total = parsed.get("total", 0)
     result.passed = parsed.get("passed", 0)
     result.failed = parsed.get("failed", 0)
     result.errors = parsed.get("errors", 0)
 
-    for detail in parsed.get("details", []):
-        result.results.append(
-            TestResult(
-                test_name=detail.get("name", "unknown"),
-                passed=detail.get("status") == "PASS",
-                message=detail.get("message", ""),
-                execution_time=parsed.get("elapsed", 0.0),
-            )
+    elapsed = parsed.get("elapsed", 0.0)
+    result.results = [
+        TestResult(
+            test_name=detail.get("name", "unknown"),
+            passed=detail.get("status") == "PASS",
+            message=detail.get("message", ""),
+            execution_time=elapsed,
         )
+        for detail in parsed.get("details", ())
+    ]
 
     result.compute_pass_rate()
-    return result, raw
+    return result
+
+
+async def run_tests_batch_async(
+    items: list[tuple[str, str, str]],
+    timeout: float = 3.0,
+    limit: int | None = None,
+) -> list[tuple[TestSuiteResult, dict]]:
+    """
+    Run many (submission_code, test_code, function_name) items concurrently.
+
+    Sandboxes are awaited on the running event loop, at most `limit` at a
+    time (default: all CPUs but two). Results come back in input order.
+    """
+    gate = asyncio.Semaphore(limit or default_batch_workers())
+
+    async def run_one(code: str, tests: str, func: str):
+        async with gate:
+            return await run_tests_async(code, tests, func, timeout)
+
+    return list(await asyncio.gather(
+        *(run_one(code, tests, func) for code, tests, func in items)
+    ))
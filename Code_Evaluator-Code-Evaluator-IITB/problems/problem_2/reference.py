@@ -1,16 +1,26 @@
+from functools import lru_cache
+
+
 def generate_parentheses(n: int) -> list[str]:
-    result = []
+    """
+    Generate all balanced strings of n pairs of parentheses, in sorted order.
+
+    Builds the answer bottom-up from the Catalan recurrence: every balanced
+    string of m pairs is "(" + a + ")" + b, with a and b balanced strings of
+    k and m-1-k pairs. No recursion and no per-character string building.
+    Results are memoized per n; each call returns a fresh list.
+    """
+    return list(_generate_parentheses_cached(n))
 
-    def backtrack(current: str, open_count: int, close_count: int):
-        if len(current) == 2 * n:
-            result.append(current)
-            return
-        if open_count < n:
-            backtrack(current + "(", open_count + 1, close_count)
-        if close_count < open_count:
-            backtrack(current + ")", open_count, close_count + 1)
 
-    if n == 0:
-        return [""]
-    backtrack("", 0, 0)
-    return result
+@lru_cache(maxsize=None)
+def _generate_parentheses_cached(n: int) -> tuple[str, ...]:
+    table = [[""]]
+    for m in range(1, n + 1):
+        table.append([
+            "(" + a + ")" + b
+            for k in range(m)
+            for a in table[k]
+            for b in table[m - 1 - k]
+        ])
+    return tuple(sorted(table[n]))
@@ -1,10 +1,18 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
 def climb_stairs(n: int) -> int:
     """
     Calculate the number of distinct ways to climb a staircase of n steps,
     where each time you can climb 1 or 2 steps.
 
-    Uses iterative DP with O(n) time and O(1) space.
-    This is equivalent to computing the (n+1)-th Fibonacci number.
+    The answer is the (n+1)-th Fibonacci number, computed by fast doubling
+    in O(log n) arithmetic steps with constant working space per call:
+        F(2k)   = F(k) * (2*F(k+1) - F(k))
+        F(2k+1) = F(k)^2 + F(k+1)^2
+    Results are memoized, so repeated calls for the same n are O(1). The
+    memo is unbounded: it keeps one entry per distinct n ever requested.
 
     Args:
         n: The number of steps in the staircase (1 <= n <= 45).
@@ -15,12 +23,14 @@ def climb_stairs(n: int) -> int:
     if n <= 2:
         return n
 
-    prev2 = 1  # ways to climb 1 step
-    prev1 = 2  # ways to climb 2 steps
-
-    for _ in range(3, n + 1):
-        current = prev1 + prev2
-        prev2 = prev1
-        prev1 = current
+    # Walk the bits of n+1 from the top, keeping (F(k), F(k+1))
+    a, b = 0, 1
+    for bit in bin(n + 1)[2:]:
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        if bit == "1":
+            a, b = d, c + d
+        else:
+            a, b = c, d
 
-    return prev1
+    return a
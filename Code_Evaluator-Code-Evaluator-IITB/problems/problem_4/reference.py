@@ -1,68 +1,70 @@
+from functools import lru_cache
+
+_DIGITS = frozenset("0123456789")
+
+
+@lru_cache(maxsize=1024)
 def evaluate_expression(s: str) -> int:
     """
     Evaluate a simple arithmetic expression string containing +, -, *, /,
     parentheses, digits, and spaces. Returns the integer result using
     integer division that truncates toward zero.
 
-    Uses a stack-based approach with operator precedence handling.
+    Uses recursive descent with operator precedence handling. Spaces are
+    stripped once up front, so the parser never has to skip them. The
+    parser position is shared through a one-element list, so the helpers
+    live at module level instead of being rebuilt on every call. Results
+    are memoized, so evaluating the same string again is O(1).
     """
-    i = 0
+    return _parse_expr(s.replace(" ", ""), [0])
+
+
+def _parse_expr(s: str, pos: list[int]) -> int:
+    """Parse an expression handling + and - (lowest precedence)."""
     n = len(s)
+    result = _parse_term(s, pos)
+    while pos[0] < n:
+        if s[pos[0]] == '+':
+            pos[0] += 1
+            result += _parse_term(s, pos)
+        elif s[pos[0]] == '-':
+            pos[0] += 1
+            result -= _parse_term(s, pos)
+        else:
+            break
+    return result
 
-    def parse_expr():
-        """Parse an expression handling + and - (lowest precedence)."""
-        nonlocal i
-        result = parse_term()
-        while i < n:
-            if s[i] == ' ':
-                i += 1
-                continue
-            if s[i] == '+':
-                i += 1
-                result += parse_term()
-            elif s[i] == '-':
-                i += 1
-                result -= parse_term()
-            else:
-                break
-        return result
 
-    def parse_term():
-        """Parse a term handling * and / (higher precedence)."""
-        nonlocal i
-        result = parse_factor()
-        while i < n:
-            if s[i] == ' ':
-                i += 1
-                continue
-            if s[i] == '*':
-                i += 1
-                result *= parse_factor()
-            elif s[i] == '/':
-                i += 1
-                divisor = parse_factor()
-                result = int(result / divisor)  # truncate toward zero
-            else:
-                break
-        return result
+def _parse_term(s: str, pos: list[int]) -> int:
+    """Parse a term handling * and / (higher precedence)."""
+    n = len(s)
+    result = _parse_factor(s, pos)
+    while pos[0] < n:
+        if s[pos[0]] == '*':
+            pos[0] += 1
+            result *= _parse_factor(s, pos)
+        elif s[pos[0]] == '/':
+            pos[0] += 1
+            divisor = _parse_factor(s, pos)
+            result = int(result / divisor)  # truncate toward zero
+        else:
+            break
+    return result
 
-    def parse_factor():
-        """Parse a factor: a number or a parenthesized expression."""
-        nonlocal i
-        while i < n and s[i] == ' ':
-            i += 1
-        if s[i] == '(':
-            i += 1  # skip '('
-            result = parse_expr()
-            while i < n and s[i] == ' ':
-                i += 1
-            i += 1  # skip ')'
-            return result
-        # Parse a number (possibly with leading unary minus)
-        num = 0
-        while i < n and s[i].isdigit():
-            num = num * 10 + int(s[i])
-            i += 1
-        return num
 
-    return parse_expr()
+def _parse_factor(s: str, pos: list[int]) -> int:
+    """Parse a factor: a number or a parenthesized expression."""
+    if s[pos[0]] == '(':
+        pos[0] += 1  # skip '('
+        result = _parse_expr(s, pos)
+        pos[0] += 1  # skip ')'
+        return result
+    # Parse a number
+    i = pos[0]
+    n = len(s)
+    num = 0
+    while i < n and s[i] in _DIGITS:
+        num = num * 10 + ord(s[i]) - 48  # 48 == ord("0")
+        i += 1
+    pos[0] = i
+    return num
@@ -1,10 +1,11 @@
-from collections import deque
-
-
 def shortest_path(graph: dict[int, list[int]], start: int, end: int) -> int:
     """Find the length of the shortest path between start and end in an unweighted graph.
 
-    Uses BFS to guarantee shortest path in an unweighted graph.
+    Uses bidirectional BFS: since the graph is undirected, a search from
+    end walks the same edges backwards, so two searches grow one level at
+    a time, always expanding the smaller frontier, until they meet. This
+    visits roughly 2*b^(d/2) nodes instead of b^d for branching factor b
+    and distance d, and never more than a plain BFS, so it stays O(V+E).
     Returns -1 if no path exists.
     """
     if start == end:
@@ -13,19 +14,27 @@ def shortest_path(graph: dict[int, list[int]], start: int, end: int) -> int:
     if start not in graph:
         return -1
 
-    visited = set()
-    visited.add(start)
-    queue = deque([(start, 0)])
-
-    while queue:
-        node, distance = queue.popleft()
-
-        for neighbor in graph.get(node, []):
-            if neighbor == end:
-                return distance + 1
-
-            if neighbor not in visited:
-                visited.add(neighbor)
-                queue.append((neighbor, distance + 1))
+    neighbors_of = graph.get
+    frontier, other_frontier = [start], [end]
+    visited, other_visited = {start}, {end}
+    distance = 0
+
+    while frontier and other_frontier:
+        distance += 1
+        if len(frontier) > len(other_frontier):
+            frontier, other_frontier = other_frontier, frontier
+            visited, other_visited = other_visited, visited
+
+        visit = visited.add
+        next_frontier = []
+        for node in frontier:
+            for neighbor in neighbors_of(node, ()):
+                if neighbor in other_visited:
+                    return distance
+
+                if neighbor not in visited:
+                    visit(neighbor)
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
 
     return -1
@@ -0,0 +1,68 @@
+"""Tests for the content-addressed disk cache."""
+
+import importlib
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from evaluator import _cache
+from test_schema import sample_result
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.root = Path(tmpdir.name)
+        # CACHE_DIR is read from the environment at import time
+        env = mock.patch.dict(os.environ, {"CODE_EVAL_CACHE_DIR": tmpdir.name})
+        env.start()
+        importlib.reload(_cache)
+        self.addCleanup(importlib.reload, _cache)
+        self.addCleanup(env.stop)
+
+    def test_cache_dir_comes_from_environment(self):
+        self.assertEqual(_cache.CACHE_DIR, self.root)
+
+    def test_store_then_load(self):
+        _cache.store("ruff", "k1", [{"rule": "E501"}])
+        _cache.store("results", "k1", {"score": 7.5})
+        self.assertEqual(_cache.load("ruff", "k1"), [{"rule": "E501"}])
+        self.assertEqual(_cache.load("results", "k1"), {"score": 7.5})
+        self.assertIsNone(_cache.load("ruff", "missing"))
+
+    def test_store_replaces_entry_without_leaving_temp_files(self):
+        _cache.store("ruff", "k1", [1])
+        _cache.store("ruff", "k1", [2])
+        self.assertEqual(_cache.load("ruff", "k1"), [2])
+        self.assertEqual(os.listdir(self.root / "ruff"), ["k1.json"])
+
+    def test_failed_store_keeps_previous_entry(self):
+        _cache.store("ruff", "k1", [1])
+        with self.assertRaises(TypeError):
+            _cache.store("ruff", "k1", [object()])
+        self.assertEqual(_cache.load("ruff", "k1"), [1])
+        self.assertEqual(os.listdir(self.root / "ruff"), ["k1.json"])
+
+    def test_unreadable_entry_is_a_miss(self):
+        (self.root / "ruff").mkdir()
+        (self.root / "ruff" / "k1.json").write_text('{"truncated": ')
+        self.assertIsNone(_cache.load("ruff", "k1"))
+
+    def test_result_round_trip(self):
+        result = sample_result()
+        _cache.put("k1", result)
+        self.assertEqual(_cache.get("k1"), result)
+
+    def test_stale_result_is_a_miss(self):
+        _cache.store("results", "k1", {"problem_id": "problem_1"})
+        self.assertIsNone(_cache.get("k1"))
+
+    def test_cache_key_separates_parts(self):
+        self.assertNotEqual(_cache.cache_key("ab", "c"), _cache.cache_key("a", "bc"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+"""Tests for the LLM judge, with the model call stubbed out."""
+
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+from evaluator import llm_judge
+from evaluator.schema import ExecutionArtifact, RubricScores
+
+DIMENSIONS = ("correctness", "edge_cases", "complexity", "style", "clarity")
+
+
+def _judgment(score, drop=None):
+    return {
+        "scores": {d: score for d in DIMENSIONS if d != drop},
+        "issues": [f"scored {score}"],
+        "confidence": 0.9,
+    }
+
+
+def _item(index):
+    return {
+        "problem_statement": f"Problem {index}",
+        "submission_code": f"def f():\n    return {index}\n",
+        "reference_code": "def f():\n    return 0\n",
+        "artifact": ExecutionArtifact(),
+        "deterministic_scores": RubricScores(*([float(index)] * 5)),
+    }
+
+
+def _is_packed(user_prompt):
+    return user_prompt.startswith("Evaluate each of the following")
+
+
+class TestPackedJudging(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(llm_judge, "_get_api_token", return_value="token")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.items = [_item(1), _item(2)]
+
+    def _judge(self, packed_response):
+        """Judge self.items; single-submission calls score 5.0 each."""
+        calls = []
+
+        def invoke(system_prompt, user_prompt, model, api_token, max_tokens=800):
+            calls.append(_is_packed(user_prompt))
+            if not _is_packed(user_prompt):
+                return json.dumps(_judgment(5.0))
+            if isinstance(packed_response, Exception):
+                raise packed_response
+            return packed_response
+
+        with mock.patch.object(llm_judge, "_invoke_model", side_effect=invoke):
+            judgments = llm_judge.judge_submissions_packed(self.items, k=4)
+        return judgments, calls
+
+    def test_well_formed_response(self):
+        response = json.dumps({"judgments": [_judgment(7.0), _judgment(3.0)]})
+        judgments, calls = self._judge(response)
+        self.assertEqual(calls, [True])
+        self.assertEqual([j.scores.correctness for j in judgments], [7.0, 3.0])
+        self.assertEqual(judgments[1].issues, ["scored 3.0"])
+
+    def test_wrong_count_falls_back_per_item(self):
+        response = json.dumps({"judgments": [_judgment(7.0)]})
+        judgments, calls = self._judge(response)
+        self.assertEqual(calls, [True, False, False])
+        self.assertEqual([j.scores.correctness for j in judgments], [5.0, 5.0])
+
+    def test_missing_score_falls_back_per_item(self):
+        response = json.dumps(
+            {"judgments": [_judgment(7.0), _judgment(3.0, drop="clarity")]}
+        )
+        judgments, calls = self._judge(response)
+        self.assertEqual(calls, [True, False, False])
+        self.assertEqual([j.scores.correctness for j in judgments], [5.0, 5.0])
+
+    def test_failed_call_falls_back_per_item(self):
+        judgments, calls = self._judge(RuntimeError("connection reset"))
+        self.assertEqual(calls, [True, False, False])
+        self.assertEqual(len(judgments), 2)
+
+    def test_parse_packed_response(self):
+        two = json.dumps({"judgments": [_judgment(7.0), _judgment(3.0)]})
+        self.assertEqual(len(llm_judge._parse_packed_response(two, 2)), 2)
+        self.assertIsNone(llm_judge._parse_packed_response(two, 3))
+        self.assertIsNone(llm_judge._parse_packed_response("not json", 2))
+        self.assertIsNone(llm_judge._parse_packed_response(
+            json.dumps({"judgments": [_judgment(7.0, drop="style")]}), 1
+        ))
+
+
+class TestHedgedInvocation(unittest.TestCase):
+    PRIMARY, HEDGE, SPARE = "primary-model", "hedge-model", "spare-model"
+
+    def setUp(self):
+        # Set at teardown so a stalled "slow" call does not linger
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.calls = []
+
+    def _model(self, behaviour):
+        """
+        Stub _invoke_model. behaviour maps each model to "ok", "fail",
+        "slow" (answers once the test ends) or "slow-fail" (fails after
+        0.2s, well past the hedge delay).
+        """
+        def invoke(system_prompt, user_prompt, model, api_token, max_tokens=800):
+            self.calls.append(model)
+            if behaviour[model] == "slow":
+                self.release.wait(5)
+            elif behaviour[model] == "slow-fail":
+                time.sleep(0.2)
+            if behaviour[model].endswith("fail"):
+                raise RuntimeError(f"{model} unavailable")
+            return json.dumps(_judgment(7.0))
+        return mock.patch.object(llm_judge, "_invoke_model", side_effect=invoke)
+
+    def _hedged(self, tried):
+        return llm_judge._invoke_hedged(
+            "system", "user", self.PRIMARY, self.HEDGE, "token", tried,
+            hedge_delay=0.05,
+        )
+
+    def test_primary_wins(self):
+        tried = set()
+        with self._model({self.PRIMARY: "ok", self.HEDGE: "ok"}):
+            parsed, _, used = self._hedged(tried)
+        self.assertIsNotNone(parsed)
+        self.assertEqual(used, self.PRIMARY)
+        self.assertEqual(tried, {self.PRIMARY})
+        self.assertEqual(self.calls, [self.PRIMARY])
+
+    def test_hedge_wins_over_slow_primary(self):
+        tried = set()
+        with self._model({self.PRIMARY: "slow", self.HEDGE: "ok"}):
+            parsed, _, used = self._hedged(tried)
+        self.assertIsNotNone(parsed)
+        self.assertEqual(used, self.HEDGE)
+        self.assertEqual(tried, {self.PRIMARY, self.HEDGE})
+
+    def test_both_fail(self):
+        tried = set()
+        with self._model({self.PRIMARY: "slow-fail", self.HEDGE: "fail"}):
+            with self.assertRaisesRegex(RuntimeError, self.PRIMARY):
+                self._hedged(tried)
+        self.assertEqual(tried, {self.PRIMARY, self.HEDGE})
+
+    def test_fallback_loop_skips_tried_models(self):
+        behaviour = {self.PRIMARY: "slow-fail", self.HEDGE: "fail", self.SPARE: "ok"}
+        invoke_hedged = llm_judge._invoke_hedged
+
+        def fast_hedge(*args, **kwargs):
+            return invoke_hedged(*args, hedge_delay=0.05, **kwargs)
+
+        with self._model(behaviour), \
+                mock.patch.object(llm_judge, "_get_api_token", return_value="token"), \
+                mock.patch.object(llm_judge, "FALLBACK_MODELS", [self.HEDGE, self.SPARE]), \
+                mock.patch.object(llm_judge, "_invoke_hedged", side_effect=fast_hedge):
+            judgment = llm_judge.judge_submission(**_item(1), model=self.PRIMARY)
+        self.assertEqual(judgment.scores.correctness, 7.0)
+        # Hedged once per attempt, never called again as a serial fallback
+        self.assertEqual(self.calls.count(self.HEDGE), 2)
+        self.assertEqual(self.calls[-1], self.SPARE)
+
+
+if __name__ == "__main__":
+    unittest.main()
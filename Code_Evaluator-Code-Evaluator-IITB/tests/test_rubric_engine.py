@@ -0,0 +1,34 @@
+"""Tests for the deterministic rubric engine."""
+
+import unittest
+from unittest import mock
+
+from evaluator import rubric_engine
+from evaluator.schema import TestSuiteResult
+
+VALID = "def add(a, b):\n    return a + b\n"
+BROKEN = "def add(a, b)\n    return a + b\n"
+
+
+class TestSharedParse(unittest.TestCase):
+    def test_code_is_parsed_once(self):
+        for code in (VALID, BROKEN):
+            with self.subTest(code=code), mock.patch.object(
+                rubric_engine, "_parse", wraps=rubric_engine._parse
+            ) as parse:
+                rubric_engine.compute_deterministic_scores(code, TestSuiteResult(), [])
+            self.assertEqual(parse.call_count, 1)
+
+    def test_shared_tree_matches_parsing_in_each_heuristic(self):
+        for code in (VALID, BROKEN):
+            with self.subTest(code=code):
+                scores = rubric_engine.compute_deterministic_scores(
+                    code, TestSuiteResult(), []
+                )
+                self.assertEqual(scores.complexity, rubric_engine.estimate_complexity(code))
+                self.assertEqual(scores.style, rubric_engine.compute_style_score(code, []))
+                self.assertEqual(scores.clarity, rubric_engine.compute_clarity_score(code))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""Tests for the sandbox runners and the test-runner wrappers around them."""
+
+import asyncio
+import unittest
+from unittest import mock
+
+from evaluator import sandbox
+from evaluator.sandbox import run_in_sandbox, run_in_sandbox_async
+from evaluator.test_runner import run_tests, run_tests_async, run_tests_batch_async
+
+TESTS = """
+class TestAdd(unittest.TestCase):
+    def test_small(self):
+        self.assertEqual(add(1, 2), 3)
+
+    def test_negative(self):
+        self.assertEqual(add(-1, -2), -3)
+"""
+
+CORRECT = "def add(a, b):\n    return a + b\n"
+WRONG = "def add(a, b):\n    return a - b\n"
+LOOPING = "def add(a, b):\n    while True:\n        pass\n"
+BLOCKED = "import os\n\ndef add(a, b):\n    return a + b\n"
+
+FORGED_RESULT = (
+    'print("===JSON_RESULT===")\n'
+    'print(\'{"total": 2, "passed": 2, "failed": 0, "errors": 0, "details": []}\')\n'
+)
+FORGED_AT_EXIT = (
+    "class _Finalizer:\n"
+    "    def __del__(self):\n"
+    + "".join("        " + line + "\n" for line in FORGED_RESULT.splitlines())
+    + "_finalizer = _Finalizer()\n"
+    + WRONG
+)
+FORGED_THEN_EXIT = FORGED_RESULT + "raise SystemExit(0)\n"
+
+
+def _outcomes(suite):
+    return suite.total, suite.passed, sorted(
+        (r.test_name, r.passed) for r in suite.results
+    )
+
+
+class TestRunInSandboxAsync(unittest.TestCase):
+    def test_matches_sync_runner(self):
+        for code in (CORRECT, WRONG):
+            with self.subTest(code=code):
+                sync_suite, _ = run_tests(code, TESTS, "add")
+                async_suite, raw = asyncio.run(run_tests_async(code, TESTS, "add"))
+                self.assertEqual(raw["returncode"], 0)
+                self.assertEqual(_outcomes(async_suite), _outcomes(sync_suite))
+
+    def test_timeout(self):
+        raw = asyncio.run(run_in_sandbox_async(LOOPING, TESTS, "add", timeout=0.5))
+        self.assertTrue(raw["timeout"])
+        self.assertEqual(raw, run_in_sandbox(LOOPING, TESTS, "add", timeout=0.5))
+
+    def test_safety_violation(self):
+        raw = asyncio.run(run_in_sandbox_async(BLOCKED, TESTS, "add"))
+        self.assertTrue(raw["sandbox_violation"])
+
+    def test_batch_keeps_input_order(self):
+        items = [(code, TESTS, "add") for code in (CORRECT, WRONG, CORRECT)]
+        results = asyncio.run(run_tests_batch_async(items, limit=2))
+        self.assertEqual([suite.passed for suite, _ in results], [2, 0, 2])
+
+
+class TestWorkerPoolSupport(unittest.TestCase):
+    def test_reuse_worker_falls_back_without_pool_support(self):
+        with mock.patch.object(sandbox, "WORKER_POOL_SUPPORTED", False), \
+                mock.patch.object(sandbox, "get_worker_pool") as get_pool:
+            suite, _ = run_tests(CORRECT, TESTS, "add", reuse_worker=True)
+        get_pool.assert_not_called()
+        self.assertEqual(suite.passed, 2)
+
+    def test_pool_rejects_unsupported_platform(self):
+        with mock.patch.object(sandbox, "WORKER_POOL_SUPPORTED", False):
+            with self.assertRaises(RuntimeError):
+                sandbox.SandboxWorkerPool()
+
+
+class TestWorkingDirectory(unittest.TestCase):
+    # Reads and writes relative paths; the safety check would block it
+    PROBE = (
+        "import os\n"
+        "print('LEFTOVER', os.listdir('.'))\n"
+        "open('scratch.txt', 'w').close()\n"
+        + CORRECT
+    )
+
+    def test_runs_do_not_share_files(self):
+        with mock.patch.object(sandbox, "_safety_violation", return_value=None):
+            for _ in range(2):
+                raw = run_in_sandbox(self.PROBE, TESTS, "add")
+                self.assertIn("LEFTOVER []", raw["stdout"])
+                raw = asyncio.run(run_in_sandbox_async(self.PROBE, TESTS, "add"))
+                self.assertIn("LEFTOVER []", raw["stdout"])
+
+
+class TestForgedResults(unittest.TestCase):
+    def test_forged_results_are_not_trusted(self):
+        for code in (FORGED_RESULT + WRONG, FORGED_AT_EXIT, FORGED_THEN_EXIT):
+            for reuse_worker in (False, True):
+                with self.subTest(code=code, reuse_worker=reuse_worker):
+                    suite, _ = run_tests(code, TESTS, "add", reuse_worker=reuse_worker)
+                    self.assertEqual(suite.passed, 0)
+
+    def test_output_after_marker_is_bounded(self):
+        code = (
+            "def add(a, b):\n"
+            "    print('===JSON_RESULT===')\n"
+            "    print('x' * 5_000_000)\n"
+            "    return a + b\n"
+        )
+        raw = run_in_sandbox(code, TESTS, "add", timeout=10)
+        self.assertLess(len(raw["stdout"]), 1_000_000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""Tests for the evaluation data models."""
+
+import json
+import unittest
+
+from evaluator.schema import (
+    EvaluationResult,
+    ExecutionArtifact,
+    LLMJudgment,
+    RubricScores,
+    StaticWarning,
+    TestResult,
+    TestSuiteResult,
+)
+
+
+def sample_result() -> EvaluationResult:
+    """An EvaluationResult with every nested record populated."""
+    suite = TestSuiteResult(
+        total=2,
+        passed=1,
+        failed=1,
+        results=[
+            TestResult("test_small", True, execution_time=0.01),
+            TestResult("test_large", False, "AssertionError: 3 != 4", 0.02),
+        ],
+    )
+    suite.compute_pass_rate()
+    return EvaluationResult(
+        problem_id="problem_1",
+        submission_id="sub_03",
+        deterministic_score=6.5,
+        llm_adjusted_score=6.8,
+        final_score=6.62,
+        execution_artifact=ExecutionArtifact(
+            test_results=suite,
+            static_warnings=[StaticWarning("E501", "Line too long", 4, 89)],
+            runtime_errors="",
+            execution_time=0.05,
+        ),
+        llm_judgment=LLMJudgment(
+            scores=RubricScores(6.0, 5.0, 8.0, 7.5, 7.0),
+            issues=["fails on large input"],
+            suggestions=["use a set"],
+            evidence_used=["test_large"],
+            confidence=0.8,
+            uncertainty_flags=["partial_test_coverage"],
+            raw_response='{"scores": {}}',
+        ),
+        hallucination_flags=["mentions test_missing"],
+    )
+
+
+class TestEvaluationResultRoundTrip(unittest.TestCase):
+    def test_from_dict_inverts_to_dict(self):
+        result = sample_result()
+        self.assertEqual(EvaluationResult.from_dict(result.to_dict()), result)
+
+    def test_round_trip_through_json(self):
+        result = sample_result()
+        data = json.loads(result.to_json())
+        self.assertEqual(EvaluationResult.from_dict(data), result)
+
+    def test_default_result_round_trips(self):
+        result = EvaluationResult()
+        self.assertEqual(EvaluationResult.from_dict(result.to_dict()), result)
+
+
+if __name__ == "__main__":
+    unittest.main()
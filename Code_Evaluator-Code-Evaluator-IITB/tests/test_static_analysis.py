@@ -0,0 +1,51 @@
+"""Tests for batch linting in the static analysis module."""
+
+import unittest
+from unittest import mock
+
+from evaluator import static_analysis
+from evaluator.static_analysis import run_ruff, run_ruff_batch
+
+# Clean and dirty snippets; each dirty one has warnings no other has
+CODES = [
+    "def add(a, b):\n    return a + b\n",
+    "import math\n\n\ndef area(r):\n    return 3.14 * r * r\n",
+    "def f(x):\n    return x\n",
+    "import json\nimport heapq\n\n\ndef g(l):\n    return l==None\n",
+    "def h(items=[]):\n    return items\n",
+]
+
+
+class TestRunRuffBatch(unittest.TestCase):
+    def setUp(self):
+        if run_ruff(CODES[1])[0].rule == "TOOL_ERROR":
+            self.skipTest("ruff is not installed")
+
+    def test_matches_per_file_results_in_order(self):
+        expected = [run_ruff(code) for code in CODES]
+        self.assertEqual(run_ruff_batch(CODES), expected)
+        # Reversed input must give reversed output, not a positional mix-up
+        self.assertEqual(run_ruff_batch(CODES[::-1]), expected[::-1])
+
+    def test_chunks_keep_order(self):
+        expected = [run_ruff(code) for code in CODES]
+        with mock.patch.object(static_analysis, "_RUFF_BATCH_SIZE", 2), \
+                mock.patch.object(
+                    static_analysis, "_ruff_check", wraps=static_analysis._ruff_check
+                ) as ruff_check:
+            self.assertEqual(run_ruff_batch(CODES), expected)
+        self.assertEqual(ruff_check.call_count, 3)
+
+    def test_failed_chunk_reports_tool_error(self):
+        failing = mock.patch.object(
+            static_analysis,
+            "_ruff_check",
+            side_effect=static_analysis._RuffUnavailable("timed out"),
+        )
+        with failing:
+            results = run_ruff_batch(CODES)
+        self.assertEqual(results, [static_analysis._tool_error()] * len(CODES))
+
+
+if __name__ == "__main__":
+    unittest.main()